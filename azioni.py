@@ -0,0 +1,47 @@
+from functools import lru_cache
+
+# Codici interi delle azioni: i motori di ricerca lavorano sui codici,
+# i nomi ('Up', 'Down', ...) servono solo all'interfaccia (percorsi restituiti, GUI, CLI)
+UP, DOWN, LEFT, RIGHT, PAINT = range(5)
+ACTION_NAMES = ('Up', 'Down', 'Left', 'Right', 'Paint')
+ACTION_CODES = {name: code for code, name in enumerate(ACTION_NAMES)}
+OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Cella bloccata: non attraversabile e da non colorare
+BLOCKED = 'X'
+
+
+@lru_cache(maxsize=None)
+def move_table(rows, cols, blocked=frozenset()):
+    """
+    Tabella precompilata dei movimenti per una griglia rows x cols, condivisa da tutte le istanze
+    con la stessa forma e le stesse celle bloccate.
+
+    :param blocked: frozenset delle posizioni (x, y) non attraversabili.
+
+    :return: Tupla indicizzata da x * cols + y; per ogni cella una tupla di (codice, posizione vicina).
+             Le posizioni sono tuple condivise, così gli stati figli non allocano nuove coordinate.
+    """
+    positions = [(x, y) for x in range(rows) for y in range(cols)]
+    table = []
+    for x, y in positions:
+        moves = []
+        if (x, y) in blocked:
+            table.append(())
+            continue
+        for code, (dx, dy) in enumerate(OFFSETS):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < rows and 0 <= ny < cols and (nx, ny) not in blocked:
+                moves.append((code, positions[nx * cols + ny]))
+        table.append(tuple(moves))
+    return tuple(table)
+
+
+def blocked_cells(grid):
+    # Posizioni delle celle bloccate di una griglia
+    return frozenset((x, y) for x, row in enumerate(grid) for y, cell in enumerate(row) if cell == BLOCKED)
+
+
+def action_names(path):
+    # Converte un percorso di codici nei nomi delle azioni
+    return [ACTION_NAMES[code] for code in path]
@@ -0,0 +1,255 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import time
+
+from distanze import distance_heuristic
+from frontiera import TIE_BREAKS
+from ricercaesterna import external_memory_search
+from uniformcoloring import (UniformColoring, a_star_search_optimized, calculate_total_cost, find_starting_position,
+                             heuristic_manhattan_distance, improved_heuristic, macro_search,
+                             uniform_cost_search_optimized)
+
+COLOR_COSTS = {'B': 1, 'Y': 2, 'G': 3}
+
+# Distribuzioni dei colori (pesi per B, Y, G)
+DISTRIBUTIONS = {
+    'uniforme': (1, 1, 1),
+    'dominante': (8, 1, 1),
+    'due-colori': (1, 1, 0),
+}
+
+T_POSITIONS = ('angolo', 'centro', 'casuale')
+
+
+def generate_grid(rows, cols, seed, distribution='uniforme', t_position='casuale'):
+    """
+    Genera un'istanza casuale (ma riproducibile) di Uniform Coloring.
+
+    :param rows: Numero di righe.
+    :param cols: Numero di colonne.
+    :param seed: Seme del generatore casuale.
+    :param distribution: Nome di una distribuzione in DISTRIBUTIONS.
+    :param t_position: 'angolo', 'centro' o 'casuale'.
+    :return: La griglia come lista di stringhe, con una sola 'T'.
+    """
+    rng = random.Random(f"{rows}x{cols}-{seed}-{distribution}-{t_position}")
+    colors = list(COLOR_COSTS)
+    weights = DISTRIBUTIONS[distribution]
+    grid = [rng.choices(colors, weights=weights, k=cols) for _ in range(rows)]
+
+    if t_position == 'angolo':
+        tx, ty = 0, 0
+    elif t_position == 'centro':
+        tx, ty = rows // 2, cols // 2
+    else:
+        tx, ty = rng.randrange(rows), rng.randrange(cols)
+    grid[tx][ty] = 'T'
+    return ["".join(row) for row in grid]
+
+
+def _load_reference_module():
+    # ricerca/ non è un package: il modulo di riferimento viene caricato dal percorso del file
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ricerca', 'UniformColoring.py')
+    spec = importlib.util.spec_from_file_location('ricerca_uniformcoloring', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _zero_heuristic(state, goal_color, color_costs):
+    return 0
+
+
+def _run_reference_ucs(grid, goal_color, start_position, track_memory=False):
+    # Il modello di riferimento non raccoglie statistiche: il picco di memoria non viene misurato
+    reference = _load_reference_module()
+    problem = reference.UniformColoring((tuple(grid), start_position), goal_color, start_position, COLOR_COSTS)
+    # La UCS di riferimento stampa ogni azione: l'output viene scartato
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = reference.uniform_cost_search(problem)
+        duration = time.perf_counter() - start
+    # Il modello di riferimento non richiede il ritorno della testina alla posizione iniziale:
+    # il suo costo non è confrontabile con quello degli altri solutori e la tabella non lo media
+    return {'cost': result[1] if result else None, 'duration': duration, 'comparable_cost': False}
+
+
+def _run_optimized(search):
+    def run(grid, goal_color, start_position, track_memory=False):
+        problem = UniformColoring((tuple(grid), start_position), goal_color, start_position, COLOR_COSTS)
+        # I tempi sono misurati senza tracemalloc, che rallenterebbe la ricerca di un ordine di grandezza
+        path, cost, _, stats = search(problem, return_stats=True)
+        record = stats.as_dict()
+        record['cost'] = cost
+        if track_memory:
+            # Picco di memoria da una seconda esecuzione, separata da quella cronometrata
+            problem = UniformColoring((tuple(grid), start_position), goal_color, start_position, COLOR_COSTS)
+            record['peak_memory'] = search(problem, return_stats=True, track_memory=True)[3].peak_memory
+        return record
+    return run
+
+
+SOLVERS = {
+    'ucs-riferimento': _run_reference_ucs,
+    'ucs': _run_optimized(lambda problem, **options: uniform_cost_search_optimized(problem, **options)),
+    'ucs-bucket': _run_optimized(lambda problem, **options: uniform_cost_search_optimized(problem, frontier='bucket', **options)),
+    'astar-improved': _run_optimized(lambda problem, **options: a_star_search_optimized(problem, improved_heuristic, **options)),
+    'astar-bucket': _run_optimized(lambda problem, **options: a_star_search_optimized(problem, improved_heuristic, frontier='bucket', **options)),
+    # Somma delle distanze di Manhattan (euristica storica di completo.py): non è ammissibile,
+    # il costo medio mostra di quanto le sue soluzioni si allontanano dall'ottimo
+    'astar-manhattan': _run_optimized(lambda problem, **options: a_star_search_optimized(problem, heuristic_manhattan_distance, **options)),
+    'astar-nulla': _run_optimized(lambda problem, **options: a_star_search_optimized(problem, _zero_heuristic, **options)),
+    'astar-distanze': _run_optimized(lambda problem, **options: a_star_search_optimized(problem, distance_heuristic(problem), **options)),
+    'esterna': _run_optimized(lambda problem, **options: external_memory_search(problem, **options)),
+    'astar-macro': _run_optimized(lambda problem, **options: macro_search(problem, improved_heuristic, **options)),
+    'ucs-potatura': _run_optimized(lambda problem, **options: uniform_cost_search_optimized(problem, prune=True, **options)),
+    'astar-potatura': _run_optimized(lambda problem, **options: a_star_search_optimized(problem, improved_heuristic, prune=True, **options)),
+}
+DEFAULT_SOLVERS = list(SOLVERS)
+
+# Effetto dello spareggio a parità di priorità sui nodi espansi (es. --solvers astar-spareggio-fifo astar-spareggio-high_g)
+for _policy in TIE_BREAKS:
+    SOLVERS[f'ucs-spareggio-{_policy}'] = _run_optimized(
+        lambda problem, policy=_policy, **options: uniform_cost_search_optimized(problem, tie_break=policy, **options))
+    SOLVERS[f'astar-spareggio-{_policy}'] = _run_optimized(
+        lambda problem, policy=_policy, **options: a_star_search_optimized(problem, improved_heuristic, tie_break=policy, **options))
+
+
+def _worker(solver_name, grid, goal_color, start_position, memory_limit, track_memory, connection):
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    try:
+        record = SOLVERS[solver_name](grid, goal_color, start_position, track_memory)
+        record['status'] = 'ok' if record['cost'] is not None else 'nessuna-soluzione'
+    except MemoryError:
+        record = {'status': 'memoria'}
+    connection.send(record)
+    connection.close()
+
+
+def run_solver(solver_name, grid, time_limit, memory_limit, track_memory=False):
+    """
+    Esegue un solutore in un processo separato, con limiti di tempo (secondi) e di memoria (byte).
+    Con track_memory il picco di memoria è misurato in una seconda esecuzione, dopo quella cronometrata.
+
+    :return: Dizionario con lo stato ('ok', 'timeout', 'memoria', 'errore', ...) e le misure raccolte.
+    """
+    start_position = find_starting_position(grid)
+    costs = {color: calculate_total_cost(grid, color, start_position, COLOR_COSTS) for color in COLOR_COSTS}
+    goal_color = min(costs, key=costs.get)
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_worker, args=(solver_name, grid, goal_color, start_position, memory_limit,
+                                                                track_memory, sender))
+    start = time.perf_counter()
+    process.start()
+    sender.close()
+
+    record = {'status': 'timeout'}
+    if receiver.poll(time_limit):
+        try:
+            record = receiver.recv()
+        except EOFError:
+            record = {'status': 'errore'}
+    process.join(0.1)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    elif record.get('status') == 'timeout':
+        record = {'status': 'errore'}
+
+    record.setdefault('duration', time.perf_counter() - start)
+    record.update({'solver': solver_name, 'goal_color': goal_color})
+    return record
+
+
+def run_benchmark(sizes, seeds, distributions, t_positions, solvers, time_limit, memory_limit, track_memory=False):
+    results = []
+    # Un solutore che supera i limiti su una dimensione viene saltato sulle dimensioni maggiori
+    exhausted = set()
+    for rows, cols in sorted(sizes, key=lambda size: size[0] * size[1]):
+        for distribution in distributions:
+            for t_position in t_positions:
+                for seed in seeds:
+                    grid = generate_grid(rows, cols, seed, distribution, t_position)
+                    for solver_name in solvers:
+                        key = (solver_name, distribution, t_position)
+                        if key in exhausted:
+                            record = {'solver': solver_name, 'status': 'saltato'}
+                        else:
+                            record = run_solver(solver_name, grid, time_limit, memory_limit, track_memory)
+                            if record['status'] in ('timeout', 'memoria'):
+                                exhausted.add(key)
+                        record.update({'rows': rows, 'cols': cols, 'seed': seed, 'distribution': distribution,
+                                       't_position': t_position, 'grid': grid})
+                        results.append(record)
+                        print(f"{rows}x{cols} {distribution:<10} {t_position:<7} seed={seed} "
+                              f"{solver_name:<24} {record['status']}")
+    return results
+
+
+def format_table(results):
+    # Tabella riassuntiva: una riga per (dimensione, solutore), medie sulle istanze risolte
+    groups = {}
+    for record in results:
+        groups.setdefault((record['rows'] * record['cols'], f"{record['rows']}x{record['cols']}", record['solver']), []).append(record)
+
+    header = f"{'griglia':<8} {'solutore':<24} {'risolte':>8} {'tempo medio (s)':>16} {'espansi medi':>13} {'costo medio':>12}"
+    lines = [header, "-" * len(header)]
+    not_comparable = False
+    for (_, size, solver_name), records in sorted(groups.items()):
+        solved = [r for r in records if r['status'] == 'ok']
+        mean = lambda key: sum(r[key] for r in solved) / len(solved) if solved and all(r.get(key) is not None for r in solved) else None
+        duration, expanded, cost = mean('duration'), mean('nodes_expanded'), mean('cost')
+        if cost is None:
+            cost = '-'
+        elif any(r.get('comparable_cost') is False for r in solved):
+            cost = 'n/c'
+            not_comparable = True
+        else:
+            cost = f'{cost:.1f}'
+        lines.append(
+            f"{size:<8} {solver_name:<24} {f'{len(solved)}/{len(records)}':>8} "
+            f"{f'{duration:.4f}' if duration is not None else '-':>16} "
+            f"{f'{expanded:.0f}' if expanded is not None else '-':>13} "
+            f"{cost:>12}"
+        )
+    if not_comparable:
+        lines.append("n/c: costo di un modello diverso (senza ritorno alla posizione iniziale), non confrontabile")
+    return "\n".join(lines)
+
+
+def _parse_size(text):
+    rows, cols = text.lower().split('x')
+    return int(rows), int(cols)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark riproducibile dei solutori di Uniform Coloring")
+    parser.add_argument('--sizes', nargs='+', type=_parse_size, default=[(2, 2), (2, 3), (3, 3), (3, 4)], help="dimensioni, es. 3x3 3x4")
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0, 1, 2])
+    parser.add_argument('--distributions', nargs='+', choices=sorted(DISTRIBUTIONS), default=sorted(DISTRIBUTIONS))
+    parser.add_argument('--t-positions', nargs='+', choices=T_POSITIONS, default=list(T_POSITIONS))
+    parser.add_argument('--solvers', nargs='+', choices=sorted(SOLVERS), default=DEFAULT_SOLVERS)
+    parser.add_argument('--time-limit', type=float, default=10.0, help="secondi per singola esecuzione")
+    parser.add_argument('--memory-limit', type=int, default=2048, help="MiB per singola esecuzione (0 = nessun limite)")
+    parser.add_argument('--peak-memory', action='store_true',
+                        help="misura anche il picco di memoria (tracemalloc) in un'esecuzione separata da quella cronometrata")
+    parser.add_argument('--output', default='risultati_benchmark.json')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.seeds, args.distributions, args.t_positions, args.solvers,
+                            args.time_limit, args.memory_limit * 1024 * 1024, args.peak_memory)
+    print()
+    print(format_table(results))
+
+    with open(args.output, 'w') as f:
+        json.dump({'parameters': {k: v for k, v in vars(args).items() if k != 'output'}, 'results': results}, f, indent=2)
+    print(f"\nRisultati salvati in {args.output}")
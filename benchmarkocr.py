@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import time
+
+import cv2
+
+from immagini import extract_grid_with_confidences, normalize_resolution, remove_table_borders
+from generatoretabelle import generate_samples
+from mosaico import recognize_montage
+
+
+def _current_recognizer(processed_image):
+    # Stesso riconoscimento di immagini.process_image_to_grid (image_to_data), con o senza cache
+    grid, _ = extract_grid_with_confidences(processed_image)
+    return grid
+
+
+# Riconoscitori confrontabili: immagine senza bordi -> lista di righe
+RECOGNIZERS = {
+    'tesseract': _current_recognizer,
+}
+
+
+def cell_accuracy(predicted, expected):
+    """
+    Confronta cella per cella la griglia riconosciuta con quella attesa.
+    Righe o celle mancanti (o in eccesso) contano come errori.
+
+    :return: Tupla (celle corrette, celle totali).
+    """
+    correct = 0
+    total = sum(len(row) for row in expected)
+    for predicted_row, expected_row in zip(predicted, expected):
+        correct += sum(1 for p, e in zip(predicted_row, expected_row) if p == e)
+        total += max(0, len(predicted_row) - len(expected_row))
+    total += sum(len(row) for row in predicted[len(expected):])
+    return correct, total
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _summarize(recognized, stages, elapsed):
+    # Riepilogo comune ai benchmark: throughput, latenza per fase e accuratezza sulle griglie riconosciute
+    per_image = []
+    correct_cells = total_cells = exact_grids = 0
+    for predicted, expected in recognized:
+        correct, total = cell_accuracy(predicted, expected)
+        correct_cells += correct
+        total_cells += total
+        exact_grids += predicted == list(expected)
+        per_image.append({'expected': list(expected), 'predicted': predicted, 'correct': correct, 'total': total})
+
+    count = len(per_image)
+    summary = {
+        'images': count,
+        'images_per_second': count / elapsed if elapsed else None,
+        'cell_accuracy': correct_cells / total_cells if total_cells else None,
+        'grid_accuracy': exact_grids / count if count else None,
+        'stages': {
+            name: {'mean': sum(times) / len(times), 'p50': _percentile(times, 0.5), 'p95': _percentile(times, 0.95)}
+            for name, times in stages.items() if times
+        },
+    }
+    return {'summary': summary, 'images': per_image}
+
+
+def run_ocr_benchmark(samples, recognizer):
+    """
+    Misura latenza per fase e accuratezza della pipeline
+    normalize_resolution -> remove_table_borders -> riconoscitore.
+
+    :param samples: Iterabile di tuple (immagine, griglia attesa).
+    :param recognizer: Funzione immagine senza bordi -> lista di righe.
+    :return: Dizionario con il riepilogo e i risultati per immagine.
+    """
+    stages = {'normalize_resolution': [], 'remove_table_borders': [], 'recognize': []}
+    recognized = []  # (griglia riconosciuta, griglia attesa) per immagine
+
+    start = time.perf_counter()
+    for image, expected in samples:
+        t0 = time.perf_counter()
+        normalized = normalize_resolution(image)
+        t1 = time.perf_counter()
+        processed = remove_table_borders(normalized)
+        t2 = time.perf_counter()
+        predicted = recognizer(processed)
+        t3 = time.perf_counter()
+
+        stages['normalize_resolution'].append(t1 - t0)
+        stages['remove_table_borders'].append(t2 - t1)
+        stages['recognize'].append(t3 - t2)
+        recognized.append((predicted, expected))
+    elapsed = time.perf_counter() - start
+
+    return _summarize(recognized, stages, elapsed)
+
+
+def run_montage_benchmark(samples, batch_size):
+    """
+    Come run_ocr_benchmark, ma le immagini senza bordi sono riconosciute a lotti di batch_size
+    con una sola chiamata a Tesseract per lotto (mosaico.recognize_montage).
+    La latenza di 'recognize' è quella del lotto divisa per il numero di immagini.
+    """
+    samples = list(samples)
+    stages = {'normalize_resolution': [], 'remove_table_borders': [], 'recognize': []}
+    recognized = []  # (griglia riconosciuta, griglia attesa) per immagine
+
+    start = time.perf_counter()
+    for first in range(0, len(samples), batch_size):
+        batch = samples[first:first + batch_size]
+        processed = []
+        for image, _ in batch:
+            t0 = time.perf_counter()
+            normalized = normalize_resolution(image)
+            t1 = time.perf_counter()
+            processed.append(remove_table_borders(normalized))
+            stages['normalize_resolution'].append(t1 - t0)
+            stages['remove_table_borders'].append(time.perf_counter() - t1)
+        t0 = time.perf_counter()
+        montage = recognize_montage(processed)
+        stages['recognize'].extend([(time.perf_counter() - t0) / len(batch)] * len(batch))
+        recognized.extend((predicted, expected) for (_, expected), (predicted, _) in zip(batch, montage))
+    elapsed = time.perf_counter() - start
+
+    return _summarize(recognized, stages, elapsed)
+
+
+def load_dataset(directory):
+    # Legge un dataset scritto da generatoretabelle.write_dataset
+    with open(os.path.join(directory, 'verita.json')) as f:
+        ground_truth = json.load(f)
+    for name, entry in sorted(ground_truth.items()):
+        yield cv2.imread(os.path.join(directory, name)), entry['grid']
+
+
+def format_summary(name, summary):
+    lines = [
+        f"Riconoscitore: {name}",
+        f"Immagini: {summary['images']} ({summary['images_per_second']:.2f} immagini/s)",
+        f"Accuratezza per cella: {summary['cell_accuracy']:.2%}",
+        f"Griglie riconosciute esattamente: {summary['grid_accuracy']:.2%}",
+    ]
+    for stage, timing in summary['stages'].items():
+        lines.append(f"  {stage:<22} media {timing['mean'] * 1000:8.2f} ms  "
+                     f"p50 {timing['p50'] * 1000:8.2f} ms  p95 {timing['p95'] * 1000:8.2f} ms")
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark di throughput e accuratezza dell'acquisizione OCR")
+    parser.add_argument('--dataset', help="cartella generata da generatoretabelle.py (altrimenti le immagini sono generate in memoria)")
+    parser.add_argument('--count', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--recognizers', nargs='+', choices=sorted(RECOGNIZERS), default=sorted(RECOGNIZERS))
+    parser.add_argument('--montage', type=int, default=0,
+                        help="confronta anche l'OCR a mosaico con lotti di N immagini (0 = disattivato)")
+    parser.add_argument('--output', help="file JSON con i risultati dettagliati")
+    args = parser.parse_args()
+
+    if args.dataset:
+        samples = list(load_dataset(args.dataset))
+    else:
+        samples = [(image, grid) for image, grid, _ in
+                   generate_samples(args.count, [(3, 3), (4, 4), (5, 6)], seed=args.seed,
+                                    cell_size=(40, 80), noise=(0.0, 12.0), blur=(0, 3), skew=(-1.5, 1.5))]
+
+    report = {}
+    for name in args.recognizers:
+        report[name] = run_ocr_benchmark(samples, RECOGNIZERS[name])
+        print(format_summary(name, report[name]['summary']))
+        print()
+    if args.montage:
+        name = f"mosaico-{args.montage}"
+        report[name] = run_montage_benchmark(samples, args.montage)
+        print(format_summary(name, report[name]['summary']))
+        print()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Risultati salvati in {args.output}")
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+# Versione della pipeline di acquisizione: va incrementata quando cambiano la pre-elaborazione
+# o il riconoscimento, così i risultati salvati con la pipeline precedente non vengono più riusati
+PIPELINE_VERSION = 2
+
+
+def pipeline_key(recognizer, ocr_config, target_cell_height):
+    """
+    Descrizione della configurazione che ha prodotto un riconoscimento, parte della chiave della cache.
+
+    :param recognizer: Percorso del riconoscimento (es. 'image_to_data', 'mosaico').
+    :param ocr_config: Opzioni passate a Tesseract.
+    :param target_cell_height: Altezza delle celle dopo la normalizzazione (None = risoluzione originale).
+    """
+    return f"v{PIPELINE_VERSION}|{recognizer}|{ocr_config}|{target_cell_height}"
+
+
+# Cache su disco dei risultati del riconoscimento (griglia + confidenze), indicizzata dall'hash
+# esatto (SHA-256) dei byte del file e dalla configurazione della pipeline che li ha prodotti.
+# Non c'è un livello per immagini "quasi identiche": un hash percettivo dell'intera tabella
+# non distingue due griglie che differiscono per una sola lettera.
+class OCRCache:
+    def __init__(self, directory='.cache_ocr'):
+        """
+        :param directory: Cartella in cui vengono salvati i risultati.
+        """
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def content_key(data, pipeline):
+        return hashlib.sha256(pipeline.encode() + b'\0' + data).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _write_json(self, path, payload):
+        # Scrittura atomica: evita file corrotti se il processo viene interrotto.
+        # Il file temporaneo è per processo: più processi (es. i worker del demone) possono salvare insieme
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    def lookup(self, data, pipeline):
+        """
+        Cerca un risultato tramite l'hash esatto del contenuto del file.
+
+        :param data: Byte del file immagine.
+        :param pipeline: Configurazione della pipeline (pipeline_key).
+        :return: Dizionario con 'grid' e 'confidences', oppure None.
+        """
+        try:
+            with open(self._entry_path(self.content_key(data, pipeline))) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, data, pipeline, grid, confidences):
+        entry = {'grid': list(grid), 'confidences': confidences}
+        self._write_json(self._entry_path(self.content_key(data, pipeline)), entry)
+        return entry
+
+    def fetch(self, data, pipeline, decode, recognize, image=None):
+        """
+        Restituisce il riconoscimento dalla cache, eseguendo l'OCR solo in caso di mancata corrispondenza.
+
+        :param data: Byte del file immagine.
+        :param pipeline: Configurazione della pipeline (pipeline_key).
+        :param decode: Funzione che decodifica i byte in un'immagine (chiamata al più una volta).
+        :param recognize: Funzione immagine -> (griglia, confidenze).
+        :param image: Immagine già decodificata, se disponibile.
+        :return: Tupla (griglia, confidenze).
+        """
+        entry = self.lookup(data, pipeline)
+        if entry is None:
+            if image is None:
+                image = decode(data)
+            grid, confidences = recognize(image)
+            entry = self.store(data, pipeline, grid, confidences)
+        return entry['grid'], entry['confidences']
+
+
+def decode_image(data):
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
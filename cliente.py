@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import socket
+import sys
+
+# Client minimale del demone (demone.py): importa solo la libreria standard,
+# quindi parte in pochi millisecondi e la latenza è quella della risoluzione
+DEFAULT_SOCKET = '/tmp/uniformcoloring.sock'
+
+
+def send_request(request, socket_path=DEFAULT_SOCKET, timeout=None):
+    """
+    Invia una richiesta al demone e attende la risposta.
+
+    :param request: Dizionario JSON (es. {'grid': [...], 'algorithm': 'ucs'} oppure {'image': 'PROVA.png'}).
+    :param socket_path: Percorso del socket Unix del demone.
+    :param timeout: Secondi massimi di attesa (None = nessun limite).
+    :return: Dizionario della risposta.
+    :raises OSError: Se il demone non è raggiungibile.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode() + b"\n")
+        with connection.makefile('rb') as stream:
+            line = stream.readline()
+    if not line:
+        raise OSError("Il demone ha chiuso la connessione senza rispondere.")
+    return json.loads(line)
+
+
+def print_response(response):
+    status = response.get('status')
+    if status == 'errore':
+        print(response.get('error'))
+        return
+    if response.get('grid'):
+        print("Griglia:")
+        for row in response['grid']:
+            print(" ".join(row))
+        print()
+    if response.get('goal_color'):
+        print(f"Colore obiettivo: {response['goal_color']}")
+    if status == 'ok':
+        print(f"Soluzione trovata con costo: {response['cost']}")
+        print(f"Azioni: {' -> '.join(response['path'])}")
+    elif status == 'interrotta':
+        print(f"Ricerca interrotta ({response['reason']}), limite inferiore sul costo ottimo: {response['lower_bound']}")
+    else:
+        print("Nessuna soluzione trovata.")
+    origin = "dalla cache del demone" if response.get('cached') else f"in {response.get('duration', 0):.3f} secondi"
+    print(f"Risposta {origin}")
+    for key, value in (response.get('stats') or {}).items():
+        if value is not None:
+            print(f"  {key}: {value}")
+    if response.get('profile'):
+        print("Tempi per fase:")
+        for name, record in response['profile']['stages'].items():
+            print(f"  {name:<22} {record['duration'] * 1000:10.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Client del demone di Uniform Coloring (sostituisce completo.py negli script)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('image', nargs='?', help="immagine della griglia (predefinita: PROVA.png)")
+    source.add_argument('--grid', nargs='+', help="righe della griglia, es. --grid BYG GTB")
+    parser.add_argument('--algorithm', default='ucs', help="ucs, a*, anytime, approssimato, gerarchico, esterna o macro")
+    parser.add_argument('--goal-color', help="colore obiettivo (predefinito: quello di costo minimo)")
+    parser.add_argument('--time-limit', type=float, help="limite di tempo della ricerca in secondi")
+    parser.add_argument('--deadline', type=float, default=1.0, help="scadenza in secondi per 'anytime'")
+    parser.add_argument('--stats', action='store_true', help="includi le statistiche della ricerca")
+    parser.add_argument('--profile', action='store_true', help="includi i tempi per fase (OCR, colore obiettivo, ricerca)")
+    parser.add_argument('--json', action='store_true', help="stampa la risposta JSON così com'è")
+    parser.add_argument('--op', default='solve', choices=['solve', 'stato', 'arresto'])
+    parser.add_argument('--socket', default=DEFAULT_SOCKET)
+    args = parser.parse_args()
+
+    request = {'op': args.op}
+    if args.op == 'solve':
+        request.update(algorithm=args.algorithm, goal_color=args.goal_color, time_limit=args.time_limit,
+                       deadline=args.deadline if args.algorithm == 'anytime' else None, stats=args.stats,
+                       profile=args.profile)
+        if args.grid:
+            request['grid'] = args.grid
+        else:
+            # Il demone ha una sua cartella di lavoro: il percorso viene risolto qui
+            request['image'] = os.path.abspath(args.image or 'PROVA.png')
+
+    try:
+        response = send_request(request, args.socket)
+    except OSError as e:
+        print(f"Demone non raggiungibile su {args.socket} ({e}). Avvialo con: python demone.py", file=sys.stderr)
+        sys.exit(2)
+
+    if args.json or args.op != 'solve':
+        print(json.dumps(response, indent=2))
+    else:
+        print_response(response)
+    sys.exit(0 if response.get('status') == 'ok' else 1)
@@ -1,276 +1,19 @@
-import sys
-from queue import PriorityQueue
-import cv2
-import pytesseract
-from aima3.search import Problem
-import time
-import heapq
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
-import time 
-
-# Funzioni per elaborazione delle immagini e acquisizione della griglia
-def remove_table_borders(image):
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    _, binary_image = cv2.threshold(gray, 128, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-    
-    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 1))
-    remove_horizontal = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-
-    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 25))
-    remove_vertical = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
-
-    borders_removed = binary_image - remove_horizontal - remove_vertical
-    borders_removed = cv2.bitwise_not(borders_removed)
-    return borders_removed
-
-def extract_and_organize_text(image):
-    custom_config = r'--oem 3 --psm 6'
-    text = pytesseract.image_to_string(image, config=custom_config)
-    
-    lines = text.splitlines()
-    cleaned_lines = [line.strip() for line in lines if line.strip()]
-    return cleaned_lines
-
-def process_image_to_grid(image_path):
-    image = cv2.imread(image_path)
-    processed_image = remove_table_borders(image)
-    sorted_rows = extract_and_organize_text(processed_image)
-    result_array = [row.replace(" ", "") for row in sorted_rows]
-    return result_array
-
-# Classe del problema di Uniform Coloring
-class UniformColoring(Problem):
-    def __init__(self, initial, goal_color, start_position, color_costs):
-        super().__init__(initial)
-        self.goal_color = goal_color
-        self.start_position = start_position
-        self.color_costs = color_costs
-
-    def actions(self, state):
-        actions = []
-        grid, (x, y) = state
-        rows, cols = len(grid), len(grid[0])
-
-        # Movimenti nella griglia
-        if x > 0: actions.append('Up')
-        if x < rows - 1: actions.append('Down')
-        if y > 0: actions.append('Left')
-        if y < cols - 1: actions.append('Right')
-
-        # Azione di colorazione solo se la cella non è colorata e non è la posizione iniziale
-        if grid[x][y] != self.goal_color and (x, y) != self.start_position:
-            actions.append('Paint')
-
-        return actions
-
-    def result(self, state, action):
-        grid, (x, y) = state
-        new_grid = [list(row) for row in grid]  # Copia della griglia
-
-        # Movimenti
-        if action == 'Up':
-            new_position = (x - 1, y)
-        elif action == 'Down':
-            new_position = (x + 1, y)
-        elif action == 'Left':
-            new_position = (x, y - 1)
-        elif action == 'Right':
-            new_position = (x, y + 1)
-        elif action == 'Paint':
-            new_grid[x][y] = self.goal_color
-            new_position = (x, y)
-
-        # Mantiene la posizione iniziale con 'T'
-        new_grid[self.start_position[0]][self.start_position[1]] = 'T'
-        return (tuple("".join(row) for row in new_grid), new_position)
-
-    def goal_test(self, state):
-        grid, position = state
-        # Verifica che tutte le celle siano colorate e che la testina sia nella posizione iniziale
-        all_colored = all(cell == self.goal_color for row in grid for cell in row if cell != 'T')
-        is_at_start = position == self.start_position
-        return all_colored and is_at_start
-
-    def path_cost(self, c, state1, action, state2):
-        # Ogni movimento e ogni pittura hanno un costo
-        if action in ['Up', 'Down', 'Left', 'Right']:
-            return c + 1
-        elif action == 'Paint':
-            return c + self.color_costs[self.goal_color]
-        else:
-            return c
-
-# Funzioni ausiliarie per UCS/A*
-def find_starting_position(grid):
-    positions = [(x, y) for x, row in enumerate(grid) for y, cell in enumerate(row) if cell == 'T']
-    
-    if len(positions) == 0:
-        raise ValueError("Errore: 'T' non trovato nella griglia.")
-    elif len(positions) > 1:
-        raise ValueError("Errore: Più di una testina ('T') trovata nella griglia.")
-    
-    return positions[0]
-
-def print_grid(grid):
-    for row in grid:
-        print(" ".join(row))
-    print()
-
-def calculate_total_cost(grid, color, start_position, color_costs):
-    rows, cols = len(grid), len(grid[0])
-    visited = set()
-    total_cost = 0
-    frontier = PriorityQueue()
-    frontier.put((0, start_position))
-
-    while not frontier.empty():
-        cost, (x, y) = frontier.get()
-
-        if (x, y) in visited:
-            continue
-
-        visited.add((x, y))
-
-        # Calcola il costo solo se la cella corrente non è la testina
-        if (x, y) != start_position:
-            current_color = grid[x][y]
-            if current_color != color:
-                step_cost = color_costs[color]
-                total_cost += step_cost
-
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # Movimenti possibili: su, giù, sinistra, destra
-            nx, ny = x + dx, y + dy  # Nuove coordinate
-            if 0 <= nx < rows and 0 <= ny < cols and (nx, ny) not in visited:  # Controlla i limiti della griglia
-                frontier.put((cost + 1, (nx, ny)))  # Aggiungi il costo per il movimento
-
-    return total_cost
-
-def find_optimal_goal_color(grid, start_position, color_costs):
-    colors = color_costs.keys()
-    costs = {color: calculate_total_cost(grid, color, start_position, color_costs) for color in colors}
-    optimal_color = min(costs, key=costs.get)
-    print(f"Costi per ogni colore: {costs}")
-    print(f"Colore obiettivo ottimale: {optimal_color}")
-    return optimal_color
-
-# Funzione UCS ottimizzata con gestione migliorata della frontiera
-def uniform_cost_search_optimized(problem, debug=False):
-    # Coda prioritaria (heap) che tiene traccia degli stati
-    frontier = []
-    # Aggiungiamo lo stato iniziale nella frontiera con un costo pari a 0
-    heapq.heappush(frontier, (0, problem.initial, []))  # (costo, stato, percorso delle azioni)
-    
-    # Dizionario che memorizza il costo minimo con cui uno stato è stato esplorato
-    explored = {}
-    
-    # Set per memorizzare stati esplorati per evitare duplicati (usiamo hashing per velocità)
-    visited = set()
-    
-    while frontier:
-        cost, state, path = heapq.heappop(frontier)  # Estrarre lo stato con il costo più basso
-        
-        # Early goal detection: se abbiamo raggiunto lo stato obiettivo, terminiamo
-        if problem.goal_test(state):
-            return path, cost, [(state, cost, path)]
-        
-        grid, current_position = state  # Estrarre la griglia e la posizione corrente
-        
-        # Genera un hash dello stato corrente per velocizzare il confronto
-        state_hash = hash(state)
-        if state_hash in visited:
-            continue
-        
-        # Aggiungi lo stato corrente alla lista degli esplorati
-        visited.add(state_hash)
-        
-        # Memorizziamo il miglior costo esplorato per lo stato
-        explored[state] = cost
-        
-        # Pre-filtraggio delle azioni: evitiamo mosse che portano indietro o sono ridondanti
-        for action in problem.actions(state):
-            child = problem.result(state, action)
-            new_cost = problem.path_cost(cost, state, action, child)
-
-            # Early goal detection: controllo immediato se il figlio è la soluzione
-            if problem.goal_test(child):
-                return path + [action], new_cost, [(child, new_cost, path + [action])]
-
-            # Ottimizzazione: esploriamo solo nuovi stati o stati con costi migliori
-            child_hash = hash(child)
-            if child_hash not in visited or explored.get(child, float('inf')) > new_cost:
-                heapq.heappush(frontier, (new_cost, child, path + [action]))
-            
-            # Se la modalità debug è attiva, stampa le informazioni di debug
-            if debug:
-                print(f"Action: {action}, Cost: {new_cost}")
-                print_grid(child[0])  # Stampa la griglia dopo ogni mossa
-
-    return None
-
-# Funzione A* ottimizzata con gestione migliorata della frontiera
-def a_star_search_optimized(problem, heuristic, debug=False):
-    frontier = []
-    heapq.heappush(frontier, (0 + heuristic(problem.initial, problem.goal_color, problem.color_costs), 0, problem.initial, []))  # (f(n), g(n), stato, percorso delle azioni)
-    
-    explored = {}
-    
-    while frontier:
-        f, g, state, path = heapq.heappop(frontier)
-        
-        if problem.goal_test(state):
-            return path, g, [(state, g, path)]
-        
-        grid, _ = state
-        
-        if state in explored and explored[state] <= g:
-            continue
-        
-        explored[state] = g
-        
-        for action in problem.actions(state):
-            child = problem.result(state, action)
-            new_g = problem.path_cost(g, state, action, child)
-            new_f = new_g + heuristic(child, problem.goal_color, problem.color_costs)
-            new_path = path + [action]
-            
-            if child not in explored or explored[child] > new_g:
-                heapq.heappush(frontier, (new_f, new_g, child, new_path))
-            
-            if debug:
-                print(f"Action: {action}, Cost: {new_g}")
-                print_grid(child[0])
-
-    return None
-
-def print_optimal_solution_steps(optimal_solution_steps):
-    for i, (state, cost, path) in enumerate(optimal_solution_steps):
-        grid, _ = state
-        print(f"Passaggio {i + 1}, Costo: {cost}, Azioni: {' -> '.join(path)}")
-        print_grid(grid)
-
-# Euristica migliorata per A* che considera i costi di pittura e la distanza massima
-def improved_heuristic(state, goal_color, color_costs):
-    grid, (tx, ty) = state
-    total_paint_cost = 0
-    max_distance = 0
-    
-    for x, row in enumerate(grid):
-        for y, cell in enumerate(row):
-            if cell != goal_color:
-                # Aggiungi il costo di pittura per ogni cella che non è colorata correttamente
-                total_paint_cost += color_costs[goal_color]
-                
-                # Calcola la distanza di Manhattan dalla testina alla cella corrente
-                distance = abs(tx - x) + abs(ty - y)
-                
-                # Tieni traccia della distanza massima per considerare la cella più lontana
-                if distance > max_distance:
-                    max_distance = distance
-
-    # L'euristica è la somma del costo di pittura più la distanza massima per raggiungere la cella più lontana
-    return total_paint_cost + max_distance
+
+from limiti import BudgetExhausted, CancellationToken, SearchBudget
+from mappacalore import ExpansionHeatmap
+from profilazione import StageProfiler, active_profiler
+from ricercaincrementale import IncrementalSolver
+from tracciamento import DEBUG_TRACE_PATH
+from uniformcoloring import (UniformColoring, a_star_search_optimized, anytime_a_star_search, approximate_tour_search,
+                             calculate_total_cost, find_starting_position, hierarchical_search, improved_heuristic,
+                             macro_search, uniform_cost_search_optimized)
+
+# Lettere proposte, nell'ordine, a ogni clic su una cella della griglia riconosciuta
+EDIT_LETTERS = ('B', 'Y', 'G', 'X')
 
 # GUI per l'applicazione
 class UniformColoringGUI:
@@ -285,6 +28,10 @@ class UniformColoringGUI:
         self.canvas = tk.Canvas(self.root, width=500, height=500)
         self.canvas.pack()
 
+        # Griglia riconosciuta: un clic su una cella ne corregge la lettera (errori dell'OCR)
+        self.grid_frame = tk.Frame(self.root)
+        self.grid_frame.pack()
+
         self.upload_button = tk.Button(self.root, text="Carica Immagine", command=self.upload_image)
         self.upload_button.pack(pady=10)
 
@@ -303,26 +50,95 @@ class UniformColoringGUI:
         self.ucs_radio.pack()
         self.a_star_radio = tk.Radiobutton(self.root, text="A*", variable=self.algorithm_var, value="a*")
         self.a_star_radio.pack()
+        self.anytime_radio = tk.Radiobutton(self.root, text="A* anytime (ARA*)", variable=self.algorithm_var, value="anytime")
+        self.anytime_radio.pack()
+        self.approximate_radio = tk.Radiobutton(self.root, text="Approssimato (giro + 2-opt)", variable=self.algorithm_var, value="approssimato")
+        self.approximate_radio.pack()
+        self.hierarchical_radio = tk.Radiobutton(self.root, text="Gerarchico a blocchi (griglie grandi)", variable=self.algorithm_var, value="gerarchico")
+        self.hierarchical_radio.pack()
+        self.macro_radio = tk.Radiobutton(self.root, text="A* a macro-azioni (vai alla cella e colorala)", variable=self.algorithm_var, value="macro")
+        self.macro_radio.pack()
+        self.incremental_radio = tk.Radiobutton(self.root, text="Incrementale (riusa la ricerca dopo le correzioni)", variable=self.algorithm_var, value="incrementale")
+        self.incremental_radio.pack()
+
+        # Scadenza della ricerca anytime e soluzioni intermedie
+        self.deadline_label = tk.Label(self.root, text="Scadenza anytime (ms):")
+        self.deadline_label.pack()
+        self.deadline_var = tk.StringVar(value="200")
+        self.deadline_entry = tk.Entry(self.root, textvariable=self.deadline_var, width=8)
+        self.deadline_entry.pack()
+        self.anytime_label = tk.Label(self.root, text="")
+        self.anytime_label.pack()
 
         self.debug_var = tk.BooleanVar(value=False)
         self.debug_check = tk.Checkbutton(self.root, text="Attiva modalità Debug", variable=self.debug_var)
         self.debug_check.pack()
 
+        # Tempi per fase (lettura, OCR, costi dei colori, ricerca) mostrati insieme al risultato
+        self.profile_var = tk.BooleanVar(value=False)
+        self.profile_check = tk.Checkbutton(self.root, text="Profilazione per fase", variable=self.profile_var)
+        self.profile_check.pack()
+
+        # Mappa delle espansioni (UCS, A*, anytime) disegnata sul canvas al posto dell'immagine
+        self.heatmap_var = tk.BooleanVar(value=False)
+        self.heatmap_check = tk.Checkbutton(self.root, text="Mappa delle espansioni", variable=self.heatmap_var)
+        self.heatmap_check.pack()
+
+        # Potatura sicura dei figli (UCS e A*): stesso costo ottimo, meno nodi generati
+        self.prune_var = tk.BooleanVar(value=False)
+        self.prune_check = tk.Checkbutton(self.root, text="Potatura sicura delle mosse", variable=self.prune_var)
+        self.prune_check.pack()
+
+        # Limite di tempo per la ricerca (vuoto = nessun limite)
+        self.time_limit_label = tk.Label(self.root, text="Limite di tempo (s):")
+        self.time_limit_label.pack()
+        self.time_limit_var = tk.StringVar(value="")
+        self.time_limit_entry = tk.Entry(self.root, textvariable=self.time_limit_var, width=8)
+        self.time_limit_entry.pack()
+
         self.run_button = tk.Button(self.root, text="Esegui", command=self.run_algorithm)
         self.run_button.pack(pady=10)
 
+        self.cancel_button = tk.Button(self.root, text="Annulla", command=self.cancel_search, state="disabled")
+        self.cancel_button.pack()
+
         self.exit_button = tk.Button(self.root, text="Exit", command=self.exit_program)
         self.exit_button.pack(pady=10)
 
         self.grid_image = None
         self.grid = None
+        self.ocr_cache = None  # creata al primo caricamento: evita di ripetere l'OCR sulle immagini già riconosciute
+        self.cancel_token = None
+        self.search_thread = None
+        self.search_result = None
+        self.search_error = None  # eccezione sollevata dall'ultima ricerca, mostrata da poll_search
+        self.search_messages = queue.Queue()  # soluzioni intermedie dal thread della ricerca
+        self.profiler = None  # StageProfiler dell'immagine corrente, se la profilazione è attiva
+        self.incremental = None  # IncrementalSolver della griglia corrente, aggiornato a ogni correzione
+        self.heatmap = None  # ExpansionHeatmap dell'ultima ricerca, se richiesta
+        self.prune = False  # potatura sicura dell'ultima ricerca (letta da prune_var nel thread dell'interfaccia)
 
     def upload_image(self):
         file_path = filedialog.askopenfilename()
         if not file_path:
             return
 
-        self.grid_image = cv2.imread(file_path)
+        # Le librerie per le immagini vengono caricate solo quando servono
+        import cv2
+        from PIL import Image, ImageTk
+        from cacheocr import OCRCache
+        from immagini import process_image_to_grid, read_image
+        if self.ocr_cache is None:
+            self.ocr_cache = OCRCache()
+        self.profiler = StageProfiler() if self.profile_var.get() else None
+
+        # Il file viene letto e decodificato una sola volta: i byte fanno da chiave della cache,
+        # l'array serve sia per la miniatura sia per l'OCR
+        try:
+            data, self.grid_image = read_image(file_path, profiler=self.profiler)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Errore", str(e))
+            return
         image = cv2.cvtColor(self.grid_image, cv2.COLOR_BGR2RGB)
         image = Image.fromarray(image)
         image.thumbnail((500, 500))
@@ -330,16 +146,45 @@ class UniformColoringGUI:
         self.canvas.create_image(250, 250, image=self.tk_image)
 
         try:
-            self.grid = process_image_to_grid(file_path)
+            self.grid = process_image_to_grid(cache=self.ocr_cache, image=self.grid_image, data=data, profiler=self.profiler)
+            self.incremental = None
+            self.show_grid_editor()
             self.image_label.config(text="Immagine caricata correttamente")
             self.calculate_and_display_color_costs()  # Calcola e visualizza i costi dei colori
         except ValueError as e:
             messagebox.showerror("Errore", str(e))
 
+    def show_grid_editor(self):
+        for widget in self.grid_frame.winfo_children():
+            widget.destroy()
+        for x, row in enumerate(self.grid):
+            for y, cell in enumerate(row):
+                button = tk.Button(self.grid_frame, text=cell, width=2, command=lambda x=x, y=y: self.edit_cell(x, y))
+                if cell == 'T':
+                    button.config(state="disabled")  # la testina non si sposta
+                button.grid(row=x, column=y)
+
+    def edit_cell(self, x, y):
+        if self.search_thread is not None and self.search_thread.is_alive():
+            messagebox.showwarning("Attenzione", "Attendi la fine della ricerca prima di correggere la griglia.")
+            return
+        from griglia import Grid
+        rows = list(self.grid)
+        old = rows[x][y]
+        letter = EDIT_LETTERS[(EDIT_LETTERS.index(old) + 1) % len(EDIT_LETTERS)] if old in EDIT_LETTERS else EDIT_LETTERS[0]
+        rows[x] = rows[x][:y] + letter + rows[x][y + 1:]
+        self.grid = Grid.from_rows(rows)  # la griglia riconosciuta è immutabile
+        self.grid_frame.grid_slaves(row=x, column=y)[0].config(text=letter)
+        # Il risolutore incrementale ripara solo la parte della ricerca toccata dalla correzione
+        if self.incremental is not None:
+            self.incremental.update_cell(x, y, letter)
+        self.calculate_and_display_color_costs()
+
     def calculate_and_display_color_costs(self):
         start_position = find_starting_position(self.grid)
         color_costs = {'B': 1, 'Y': 2, 'G': 3}  # Definisci i costi dei colori
-        costs = {color: calculate_total_cost(self.grid, color, start_position, color_costs) for color in color_costs}
+        with active_profiler(self.profiler).stage('color_costs'):
+            costs = {color: calculate_total_cost(self.grid, color, start_position, color_costs) for color in color_costs}
         
         # Mostra i costi nella GUI
         self.color_costs_label.config(text=f"Costi dei colori: {costs}")
@@ -368,41 +213,147 @@ class UniformColoringGUI:
             initial_state = (tuple(self.grid), start_position)
             problem = UniformColoring(initial=initial_state, goal_color=chosen_goal_color, start_position=start_position, color_costs=color_costs)
 
-            # Avvia il timer
-            start_time = time.time()
-
-            # Esegui l'algoritmo selezionato
-            if self.algorithm_var.get() == "ucs":
-                path, total_cost, optimal_solution_steps = uniform_cost_search_optimized(problem, self.debug_var.get())
-                algo_name = "UCS"
-            else:
-                path, total_cost, optimal_solution_steps = a_star_search_optimized(problem, improved_heuristic, self.debug_var.get())
-                algo_name = "A*"
-
-            # Ferma il timer
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-
-            if path:
-                if not self.debug_var.get():
-                    messagebox.showinfo(
-                        "Soluzione trovata", 
-                        f"{algo_name} trovato soluzione con costo: {total_cost}\nTempo impiegato: {elapsed_time:.3f} secondi"
-                    )
-                    self.show_solution_steps(optimal_solution_steps)
-                else:
-                    num_moves = len(path)
-                    messagebox.showinfo(
-                        "Soluzione trovata", 
-                        f"{algo_name} trovato soluzione con costo: {total_cost}, {num_moves} mosse\nTempo impiegato: {elapsed_time:.3f} secondi"
-                    )
-                    self.show_solution_steps(optimal_solution_steps)
-            else:
-                messagebox.showwarning("Nessuna soluzione", "Nessuna soluzione trovata.")
-
+            # Limiti della ricerca: il pulsante "Annulla" usa il token di annullamento
+            time_limit = self.time_limit_var.get().strip()
+            self.cancel_token = CancellationToken()
+            budget = SearchBudget(time_limit=float(time_limit) if time_limit else None, token=self.cancel_token)
+            # La scadenza serve solo alla ricerca anytime: un campo vuoto non blocca gli altri algoritmi
+            algorithm = self.algorithm_var.get()
+            deadline = float(self.deadline_var.get()) / 1000 if algorithm == "anytime" else None
         except ValueError as e:
             messagebox.showerror("Errore", str(e))
+            return
 
+        # Profilazione: le fasi dell'immagine restano, la ricerca viene misurata di nuovo a ogni esecuzione
+        if not self.profile_var.get():
+            self.profiler = None
+        elif self.profiler is None:
+            self.profiler = StageProfiler()
+        else:
+            self.profiler.discard('search')
+
+        self.heatmap = ExpansionHeatmap(problem) if self.heatmap_var.get() and algorithm in ("ucs", "a*", "anytime") else None
+        self.prune = self.prune_var.get()
+
+        # La ricerca gira in un thread separato per non bloccare l'interfaccia
+        self.anytime_label.config(text="")
+        self.run_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.search_result = None
+        self.search_error = None
+        self.search_thread = threading.Thread(
+            target=self.solve, args=(problem, algorithm, self.debug_var.get(), budget, deadline), daemon=True)
+        self.search_thread.start()
+        self.root.after(50, self.poll_search)
+
+    def solve(self, problem, algorithm, debug, budget, deadline):
+        # Eseguita nel thread della ricerca: non deve toccare i widget (cProfile segue solo questo thread)
+        # Un errore nella ricerca viene conservato e mostrato da poll_search nel thread dell'interfaccia
+        try:
+            with active_profiler(self.profiler).stage('search'):
+                self._solve(problem, algorithm, debug, budget, deadline)
+        except Exception as e:
+            self.search_error = e
+
+    def _solve(self, problem, algorithm, debug, budget, deadline):
+        if algorithm == "ucs":
+            self.search_result = ("UCS", uniform_cost_search_optimized(problem, debug, return_stats=True, budget=budget,
+                                                                       heatmap=self.heatmap, prune=self.prune))
+        elif algorithm == "anytime":
+            report = lambda *solution: self.search_messages.put(solution)
+            self.search_result = ("A* anytime", anytime_a_star_search(
+                problem, improved_heuristic, deadline=deadline, on_solution=report, return_stats=True, budget=budget,
+                heatmap=self.heatmap))
+        elif algorithm == "approssimato":
+            self.search_result = ("Approssimato", approximate_tour_search(problem, return_stats=True, budget=budget))
+        elif algorithm == "gerarchico":
+            self.search_result = ("Gerarchico", hierarchical_search(problem, return_stats=True, budget=budget))
+        elif algorithm == "macro":
+            self.search_result = ("A* a macro-azioni", macro_search(problem, improved_heuristic, return_stats=True, budget=budget))
+        elif algorithm == "incrementale":
+            grid, _ = problem.initial
+            solver = self.incremental
+            if solver is None or solver.goal_color != problem.goal_color or solver.grid != list(grid):
+                solver = self.incremental = IncrementalSolver(grid, problem.goal_color, problem.color_costs)
+            self.search_result = ("Incrementale", solver.solve(budget=budget, return_stats=True))
+        else:
+            self.search_result = ("A*", a_star_search_optimized(problem, improved_heuristic, debug, return_stats=True, budget=budget,
+                                                                heatmap=self.heatmap, prune=self.prune))
+
+    def poll_search(self):
+        while not self.search_messages.empty():
+            self.show_anytime_solution(*self.search_messages.get())
+        if self.search_thread.is_alive():
+            self.root.after(50, self.poll_search)
+            return
+
+        self.run_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        if self.search_error is not None:
+            messagebox.showerror("Errore", f"La ricerca si è interrotta con un errore: {self.search_error}")
+            return
+        algo_name, result = self.search_result
+        profile = f"\n\n{self.profiler.summary()}" if self.profiler is not None else ""
+        if self.heatmap is not None:
+            self.show_heatmap()
+        if isinstance(result, BudgetExhausted):
+            messagebox.showwarning("Ricerca interrotta", result.summary() + profile)
+            return
+
+        path, total_cost, optimal_solution_steps, stats = result
+        if algo_name == "Incrementale":
+            profile = f"\nNodi riutilizzati dalla ricerca precedente: {self.incremental.reused_nodes}{profile}"
+        if path:
+            if not self.debug_var.get() or algo_name in ("A* anytime", "Approssimato", "Gerarchico", "Incrementale", "A* a macro-azioni"):
+                messagebox.showinfo(
+                    "Soluzione trovata", 
+                    f"{algo_name} trovato soluzione con costo: {total_cost}\n\n{stats.summary()}{profile}"
+                )
+                self.show_solution_steps(optimal_solution_steps)
+            else:
+                num_moves = len(path)
+                messagebox.showinfo(
+                    "Soluzione trovata", 
+                    f"{algo_name} trovato soluzione con costo: {total_cost}, {num_moves} mosse\n"
+                    f"Traccia della ricerca salvata in {DEBUG_TRACE_PATH}\n\n{stats.summary()}{profile}"
+                )
+                self.show_solution_steps(optimal_solution_steps)
+        else:
+            messagebox.showwarning("Nessuna soluzione", f"Nessuna soluzione trovata.\n\n{stats.summary()}{profile}")
+
+    def show_heatmap(self):
+        # Celle colorate per numero di espansioni con la testina sulla cella (scala logaritmica),
+        # sotto l'istogramma delle espansioni per celle ancora da colorare
+        heatmap = self.heatmap
+        self.canvas.delete("all")
+        size = min(480 // heatmap.cols, 380 // heatmap.rows)
+        left, top = (500 - size * heatmap.cols) // 2, 10
+        for x in range(heatmap.rows):
+            for y in range(heatmap.cols):
+                x0, y0 = left + y * size, top + x * size
+                self.canvas.create_rectangle(x0, y0, x0 + size, y0 + size, outline="gray",
+                                             fill="#%02x%02x%02x" % heatmap.color(x, y))
+                self.canvas.create_text(x0 + size // 2, y0 + size // 2, text=f"{heatmap.grid[x][y]}\n{heatmap.count(x, y)}")
+
+        histogram = heatmap.histogram()
+        if histogram:
+            peak = max(count for _, count in histogram)
+            width = 480 / len(histogram)
+            for i, (remaining, count) in enumerate(histogram):
+                x0 = 10 + i * width
+                self.canvas.create_rectangle(x0, 480 - 80 * count / peak, x0 + width - 1, 480, fill="orange", outline="")
+                self.canvas.create_text(x0 + width / 2, 490, text=str(remaining), font=("TkDefaultFont", 7))
+        self.image_label.config(text=f"Espansioni per cella (totale {heatmap.total}) e per celle ancora da colorare")
+
+    def cancel_search(self):
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+
+    def show_anytime_solution(self, path, cost, bound, elapsed):
+        # Chiamata dalla ricerca anytime a ogni soluzione migliorata
+        self.anytime_label.config(text=f"Soluzione migliorata: costo {cost}, {len(path)} mosse, "
+                                       f"sub-ottimalità ≤ {bound:.2f} ({elapsed * 1000:.0f} ms)")
+        self.root.update_idletasks()
 
     def show_solution_steps(self, optimal_solution_steps):
         result_window = tk.Toplevel(self.root)
@@ -0,0 +1,407 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_SOCKET = '/tmp/uniformcoloring.sock'
+COLOR_COSTS = {'B': 1, 'Y': 2, 'G': 3}
+
+# Stato dei processi di lavoro: moduli importati e cache OCR create una sola volta dall'initializer
+_ocr_cache = None
+
+
+def _warm_worker(ocr):
+    # Importa i solutori (e, se richiesto, OpenCV e Tesseract) prima della prima richiesta
+    global _ocr_cache
+    import griglia  # noqa: F401  (NumPy: usato da calculate_total_cost per il colore obiettivo)
+    import uniformcoloring  # noqa: F401
+    if ocr:
+        try:
+            from cacheocr import OCRCache
+            import immagini  # noqa: F401
+            _ocr_cache = OCRCache()
+        except ImportError:
+            _ocr_cache = None
+
+
+def _algorithms():
+    # Stessi algoritmi (e stesse euristiche) di completo.py: A* e anytime usano un'euristica ammissibile,
+    # altrimenti i costi restituiti, il fattore di sub-ottimalità e il limite inferiore non sarebbero validi
+    from uniformcoloring import (a_star_search_optimized, anytime_a_star_search, approximate_tour_search,
+                                 hierarchical_search, improved_heuristic, macro_search, uniform_cost_search_optimized)
+
+    def external(problem, return_stats, budget):
+        from ricercaesterna import external_memory_search
+        return external_memory_search(problem, heuristic=improved_heuristic, return_stats=return_stats, budget=budget)
+
+    return {
+        'ucs': lambda problem, return_stats, budget, deadline: uniform_cost_search_optimized(
+            problem, return_stats=return_stats, budget=budget),
+        'a*': lambda problem, return_stats, budget, deadline: a_star_search_optimized(
+            problem, improved_heuristic, return_stats=return_stats, budget=budget),
+        'anytime': lambda problem, return_stats, budget, deadline: anytime_a_star_search(
+            problem, improved_heuristic, deadline=deadline, return_stats=return_stats, budget=budget),
+        'approssimato': lambda problem, return_stats, budget, deadline: approximate_tour_search(
+            problem, return_stats=return_stats, budget=budget),
+        'gerarchico': lambda problem, return_stats, budget, deadline: hierarchical_search(
+            problem, workers=1, return_stats=return_stats, budget=budget),
+        'esterna': lambda problem, return_stats, budget, deadline: external(problem, return_stats, budget),
+        'macro': lambda problem, return_stats, budget, deadline: macro_search(
+            problem, improved_heuristic, return_stats=return_stats, budget=budget),
+    }
+
+
+ALGORITHMS = ('ucs', 'a*', 'anytime', 'approssimato', 'gerarchico', 'esterna', 'macro')
+
+
+def _validate_colors(goal_color, color_costs):
+    # Colore obiettivo e costi della richiesta: errori leggibili invece di un KeyError dal solutore
+    if color_costs is not None:
+        if not isinstance(color_costs, dict):
+            raise ValueError("Errore: 'color_costs' deve essere un oggetto colore -> costo.")
+        missing = [color for color in COLOR_COSTS if color not in color_costs]
+        if missing:
+            raise ValueError(f"Errore: mancano i costi dei colori {', '.join(missing)} in 'color_costs'.")
+        for color, cost in color_costs.items():
+            if isinstance(cost, bool) or not isinstance(cost, (int, float)) or cost <= 0:
+                raise ValueError(f"Errore: il costo del colore {color!r} deve essere un numero positivo, non {cost!r}.")
+    colors = color_costs or COLOR_COSTS
+    if goal_color is not None and goal_color not in colors:
+        raise ValueError(f"Errore: colore obiettivo non riconosciuto: {goal_color!r}. Scegli tra {', '.join(colors)}.")
+
+
+def solve_job(job):
+    """
+    Risolve una richiesta già validata (eseguita nei processi di lavoro).
+
+    :param job: Dizionario con 'grid' oppure 'image', 'algorithm' e le opzioni della richiesta.
+    :return: Dizionario serializzabile in JSON con 'status' ('ok', 'nessuna-soluzione', 'interrotta', 'errore').
+    """
+    from limiti import BudgetExhausted, SearchBudget
+    from profilazione import StageProfiler, active_profiler
+    from uniformcoloring import UniformColoring, calculate_total_cost, find_starting_position
+
+    start = time.perf_counter()
+    profiler = StageProfiler() if job.get('profile') else None
+    stages = active_profiler(profiler)
+    try:
+        grid = job.get('grid')
+        if grid is None:
+            from immagini import process_image_to_grid
+            grid = list(process_image_to_grid(job['image'], cache=_ocr_cache, profiler=profiler))
+        color_costs = job.get('color_costs') or COLOR_COSTS
+        start_position = find_starting_position(grid)
+        goal_color = job.get('goal_color')
+        if goal_color is None:
+            with stages.stage('goal_color'):
+                costs = {color: calculate_total_cost(grid, color, start_position, color_costs) for color in color_costs}
+                goal_color = min(costs, key=costs.get)
+
+        problem = UniformColoring((tuple(grid), start_position), goal_color, start_position, color_costs)
+        time_limit = job.get('time_limit')
+        budget = SearchBudget(time_limit=time_limit) if time_limit else None
+        return_stats = bool(job.get('stats'))
+        with stages.stage('search'):
+            result = _algorithms()[job['algorithm']](problem, return_stats, budget, job.get('deadline'))
+    except (ValueError, OSError) as e:
+        return {'status': 'errore', 'error': str(e), 'duration': time.perf_counter() - start}
+
+    record = {'grid': list(grid), 'goal_color': goal_color, 'duration': time.perf_counter() - start}
+    if isinstance(result, BudgetExhausted):
+        record.update({'status': 'interrotta', 'reason': result.reason, 'lower_bound': result.lower_bound})
+        stats = result.stats
+    else:
+        stats = result[3] if return_stats and result else None
+        path, cost = (result[0], result[1]) if result and result[0] is not None else (None, None)
+        record.update({'status': 'ok' if path is not None else 'nessuna-soluzione', 'path': path, 'cost': cost})
+    if return_stats and stats is not None:
+        record['stats'] = stats.as_dict()
+    if profiler is not None:
+        record['profile'] = profiler.as_dict()
+    return record
+
+
+def _recognize_together(jobs):
+    # Le immagini di un lotto passano per un'unica chiamata a Tesseract (mosaico.py);
+    # se qualcosa non va, ogni richiesta ripete l'acquisizione da sola in solve_job e riporta il proprio errore
+    from griglia import Grid
+    from mosaico import ingest_images
+    try:
+        recognized = ingest_images([job['image'] for job in jobs], cache=_ocr_cache)
+    except (OSError, ValueError, RuntimeError):
+        return
+    for job, (rows, _) in zip(jobs, recognized):
+        try:
+            job['grid'] = list(Grid.from_rows(rows))
+        except ValueError:
+            pass
+
+
+def solve_batch(jobs):
+    # Un lotto di richieste in un solo viaggio verso il processo di lavoro;
+    # l'errore di una richiesta (es. costi dei colori non validi) non coinvolge le altre del lotto
+    images = [job for job in jobs if job.get('grid') is None]
+    if len(images) > 1 and _ocr_cache is not None:
+        _recognize_together(images)
+    results = []
+    for job in jobs:
+        try:
+            results.append(solve_job(job))
+        except Exception as e:
+            results.append({'status': 'errore', 'error': f"{type(e).__name__}: {e}"})
+    return results
+
+
+class SolverDaemon:
+    """
+    Demone locale su socket Unix: riceve richieste JSON (una per riga), le raggruppa in lotti
+    e le distribuisce a un pool di processi già avviati, con i solutori (e l'OCR) importati.
+
+    Cache condivise tra le richieste, nella memoria del demone:
+    - risultati: richieste identiche (stessa griglia o stessa immagine, stesse opzioni) non vengono risolte di nuovo;
+    - griglie: un'immagine già riconosciuta non passa più per l'OCR, anche con un algoritmo diverso.
+    Nei processi di lavoro restano in memoria le tabelle delle distanze e la cache OCR.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, workers=None, batch_size=16, batch_window=0.005,
+                 cache_size=1024, ocr=True):
+        """
+        :param socket_path: Percorso del socket Unix.
+        :param workers: Processi di lavoro (None = numero di CPU).
+        :param batch_size: Richieste massime per lotto.
+        :param batch_window: Secondi di attesa per riempire un lotto dopo la prima richiesta.
+        :param cache_size: Voci massime di ciascuna cache (LRU).
+        :param ocr: Se True, i processi di lavoro caricano OpenCV e Tesseract all'avvio.
+        """
+        self.socket_path = socket_path
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.cache_size = cache_size
+        self.ocr = ocr
+        self._results = OrderedDict()  # chiave della richiesta -> risultato
+        self._grids = OrderedDict()    # hash del file immagine -> griglia riconosciuta
+        self._queue = None
+        self._pool = None
+        self._server = None
+        self._stopped = None
+        self._connections = {}  # task della connessione -> writer
+        self.counters = {'requests': 0, 'solved': 0, 'cache_hits': 0, 'batches': 0, 'errors': 0}
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def _image_key(self, path):
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    async def _prepare(self, request):
+        """
+        Valida una richiesta e la trasforma in un lavoro per solve_job.
+
+        :return: (lavoro, chiave della cache dei risultati, hash dell'immagine o None).
+        :raises ValueError: Se la richiesta non è valida.
+        """
+        algorithm = str(request.get('algorithm', 'ucs')).lower()
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Algoritmo non riconosciuto: {algorithm!r}. Scegli tra {', '.join(ALGORITHMS)}.")
+        job = {key: request[key] for key in ('goal_color', 'color_costs', 'time_limit', 'deadline', 'stats', 'profile')
+               if request.get(key) is not None}
+        job['algorithm'] = algorithm
+        _validate_colors(job.get('goal_color'), job.get('color_costs'))
+
+        image_key = None
+        if request.get('grid') is not None:
+            grid = request['grid']
+            if not isinstance(grid, list) or not grid or not all(isinstance(row, str) and row for row in grid):
+                raise ValueError("Errore: 'grid' deve essere una lista non vuota di stringhe.")
+            if any(len(row) != len(grid[0]) for row in grid):
+                raise ValueError("Errore: le righe della griglia hanno lunghezze diverse.")
+            job['grid'] = grid
+            source = ('grid', tuple(grid))
+        elif request.get('image') is not None:
+            try:
+                # Lettura e hash dell'immagine fuori dal ciclo degli eventi, che serve le altre connessioni
+                image_key = await asyncio.get_running_loop().run_in_executor(None, self._image_key, request['image'])
+            except OSError as e:
+                raise ValueError(f"Errore: immagine non leggibile: {e}") from None
+            cached_grid = self._grids.get(image_key)
+            if cached_grid is not None:
+                job['grid'] = cached_grid
+            else:
+                job['image'] = os.path.abspath(request['image'])
+            source = ('image', image_key)
+        else:
+            raise ValueError("Errore: la richiesta deve contenere 'grid' oppure 'image'.")
+
+        options = json.dumps({key: value for key, value in job.items() if key not in ('grid', 'image')}, sort_keys=True)
+        return job, (source, options), image_key
+
+    async def _handle(self, reader, writer):
+        # Una connessione può inviare più richieste; le risposte arrivano nell'ordine di completamento
+        self._connections[asyncio.current_task()] = writer
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                pending.add(asyncio.create_task(self._respond(line, writer)))
+                pending = {task for task in pending if not task.done()}
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def _respond(self, line, writer):
+        response = await self._dispatch(line)
+        writer.write(json.dumps(response).encode() + b"\n")
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _dispatch(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Errore: la richiesta deve essere un oggetto JSON.")
+        except ValueError as e:
+            self.counters['errors'] += 1
+            return {'status': 'errore', 'error': str(e)}
+
+        response = {'id': request.get('id')} if 'id' in request else {}
+        op = request.get('op', 'solve')
+        if op == 'stato':
+            response.update(status='ok', workers=self.workers, **self.counters)
+            return response
+        if op == 'arresto':
+            self._stopped.set()
+            response.update(status='ok')
+            return response
+        if op != 'solve':
+            self.counters['errors'] += 1
+            response.update(status='errore', error=f"Operazione non riconosciuta: {op!r}")
+            return response
+
+        self.counters['requests'] += 1
+        try:
+            job, key, image_key = await self._prepare(request)
+        except ValueError as e:
+            self.counters['errors'] += 1
+            response.update(status='errore', error=str(e))
+            return response
+
+        cached = self._results.get(key)
+        if cached is not None:
+            self._results.move_to_end(key)
+            self.counters['cache_hits'] += 1
+            response.update(cached, cached=True, duration=0.0)
+            return response
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, key, image_key, future))
+        result = await future
+        response.update(result, cached=False)
+        return response
+
+    async def _batcher(self):
+        # Raccoglie le richieste per al più batch_window secondi (o batch_size richieste) e invia i lotti
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Richieste identiche nello stesso lotto vengono risolte una sola volta
+            groups = OrderedDict()
+            for job, key, image_key, future in batch:
+                groups.setdefault(key, (job, image_key, []))[2].append(future)
+            self.counters['batches'] += 1
+            entries = list(groups.items())
+            # Un sotto-lotto per processo: ogni processo riceve i suoi lavori in un solo messaggio
+            chunks = [entries[i::self.workers] for i in range(min(self.workers, len(entries)))]
+            for chunk in chunks:
+                asyncio.create_task(self._run_chunk(chunk))
+
+    async def _run_chunk(self, chunk):
+        loop = asyncio.get_running_loop()
+        jobs = [job for _, (job, _, _) in chunk]
+        try:
+            results = await loop.run_in_executor(self._pool, solve_batch, jobs)
+        except Exception as e:  # processo di lavoro terminato in modo anomalo
+            results = [{'status': 'errore', 'error': f"Errore del processo di lavoro: {e!r}"}] * len(jobs)
+        for (key, (_, image_key, futures)), result in zip(chunk, results):
+            if result['status'] == 'errore':
+                self.counters['errors'] += 1
+            else:
+                self.counters['solved'] += 1
+                if image_key is not None and 'grid' in result:
+                    self._remember(self._grids, image_key, result['grid'])
+                if result['status'] != 'interrotta':
+                    self._remember(self._results, key, result)
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+
+    async def serve(self):
+        self._queue = asyncio.Queue()
+        self._stopped = asyncio.Event()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker, initargs=(self.ocr,))
+        # Avvia subito tutti i processi, così la prima richiesta non paga gli import
+        await asyncio.gather(*(asyncio.get_running_loop().run_in_executor(self._pool, solve_batch, [])
+                               for _ in range(self.workers)))
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stopped.set)
+        batcher = asyncio.create_task(self._batcher())
+        print(f"Demone in ascolto su {self.socket_path} con {self.workers} processi di lavoro")
+        try:
+            await self._stopped.wait()
+        finally:
+            batcher.cancel()
+            self._server.close()
+            # Le connessioni ancora aperte vengono chiuse: i loro task terminano leggendo la fine del flusso
+            for writer in list(self._connections.values()):
+                writer.close()
+            if self._connections:
+                await asyncio.wait(list(self._connections), timeout=1.0)
+            await self._server.wait_closed()
+            self._pool.shutdown(cancel_futures=True)
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+        print("Demone arrestato")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Demone locale del solutore di Uniform Coloring (socket Unix)")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET)
+    parser.add_argument('--workers', type=int, default=None, help="processi di lavoro (predefinito: numero di CPU)")
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--batch-window', type=float, default=5.0, help="millisecondi di attesa per riempire un lotto")
+    parser.add_argument('--cache-size', type=int, default=1024)
+    parser.add_argument('--no-ocr', action='store_true', help="non caricare OpenCV e Tesseract nei processi di lavoro")
+    args = parser.parse_args()
+
+    daemon = SolverDaemon(args.socket, args.workers, args.batch_size, args.batch_window / 1000, args.cache_size,
+                          ocr=not args.no_ocr)
+    asyncio.run(daemon.serve())
@@ -0,0 +1,167 @@
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from azioni import ACTION_NAMES, move_table
+from griglia import Grid, state_cells
+
+DISTANCE_CACHE_DIR = '.cache_distanze'
+
+# Sorgenti elaborate insieme nella BFS vettoriale (limita la memoria delle matrici booleane)
+_SOURCE_CHUNK = 1024
+
+
+class DistanceTable:
+    # Distanze minime in mosse tra tutte le coppie di celle, indicizzate da x * cols + y.
+    # Le celle bloccate o irraggiungibili hanno distanza pari a `unreachable`.
+    def __init__(self, rows, cols, blocked, matrix):
+        self.rows = rows
+        self.cols = cols
+        self.blocked = blocked
+        self.matrix = matrix
+        self.unreachable = int(np.iinfo(matrix.dtype).max)
+
+    def index(self, cell):
+        return cell[0] * self.cols + cell[1]
+
+    def distance(self, a, b):
+        return int(self.matrix[a[0] * self.cols + a[1], b[0] * self.cols + b[1]])
+
+    def from_cell(self, cell):
+        # Riga della matrice: distanze da `cell` verso tutte le celle
+        return self.matrix[cell[0] * self.cols + cell[1]]
+
+    def reachable(self, a, b):
+        return self.distance(a, b) != self.unreachable
+
+    def walk(self, a, b):
+        """
+        Percorso minimo da `a` a `b` come lista di nomi di azioni: a ogni passo si sceglie
+        un vicino la cui distanza da `b` è minore di uno.
+        """
+        moves = move_table(self.rows, self.cols, self.blocked)
+        target = self.from_cell(b)
+        actions = []
+        current = a
+        while current != b:
+            remaining = target[self.index(current)]
+            code, current = next((code, cell) for code, cell in moves[self.index(current)]
+                                 if target[self.index(cell)] == remaining - 1)
+            actions.append(ACTION_NAMES[code])
+        return actions
+
+
+def _dtype(cells):
+    return np.uint16 if cells < np.iinfo(np.uint16).max else np.uint32
+
+
+def compute_distance_matrix(rows, cols, blocked=frozenset()):
+    """
+    Calcola le distanze minime tra tutte le coppie di celle.
+    Senza celle bloccate coincidono con le distanze di Manhattan; altrimenti si esegue una BFS
+    simultanea da tutte le sorgenti, vettoriale sulle righe della matrice.
+
+    :param blocked: frozenset delle posizioni (x, y) non attraversabili.
+    :return: Matrice NumPy (celle x celle) di interi senza segno.
+    """
+    cells = rows * cols
+    dtype = _dtype(cells)
+    if not blocked:
+        x, y = np.divmod(np.arange(cells), cols)
+        return (np.abs(x[:, None] - x[None, :]) + np.abs(y[:, None] - y[None, :])).astype(dtype)
+
+    unreachable = np.iinfo(dtype).max
+    # Vicini di ogni cella; la colonna `cells` è una sentinella sempre falsa
+    neighbours = np.full((cells, 4), cells)
+    for index, moves in enumerate(move_table(rows, cols, blocked)):
+        for code, (nx, ny) in moves:
+            neighbours[index, code] = nx * cols + ny
+    open_cells = np.array([(x, y) not in blocked for x in range(rows) for y in range(cols)])
+
+    matrix = np.full((cells, cells), unreachable, dtype=dtype)
+    # Layout per celle (righe) e sorgenti (colonne): il passo della BFS copia righe contigue
+    for first in range(0, cells, _SOURCE_CHUNK):
+        sources = np.arange(first, min(first + _SOURCE_CHUNK, cells))
+        sources = sources[open_cells[sources]]
+        columns = np.arange(len(sources))
+        frontier = np.zeros((cells + 1, len(sources)), dtype=bool)
+        frontier[sources, columns] = True
+        reached = frontier[:cells].copy()
+        distances = np.full((cells, len(sources)), unreachable, dtype=dtype)
+        distances[sources, columns] = 0
+        step = 0
+        while True:
+            step += 1
+            new = frontier[neighbours[:, 0]]
+            for k in range(1, 4):
+                new |= frontier[neighbours[:, k]]
+            new &= ~reached
+            if not new.any():
+                break
+            reached |= new
+            np.putmask(distances, new, step)
+            frontier[:cells] = new
+        # Le distanze sono simmetriche: le colonne calcolate sono anche le righe delle sorgenti
+        matrix[sources] = distances.T
+    return matrix
+
+
+def _cache_path(directory, rows, cols, blocked):
+    key = ",".join(str(x * cols + y) for x, y in sorted(blocked))
+    digest = hashlib.sha256(f"{rows}x{cols}:{key}".encode()).hexdigest()[:16]
+    return os.path.join(directory, f"{rows}x{cols}-{digest}.npy")
+
+
+@lru_cache(maxsize=32)
+def distance_table(rows, cols, blocked=frozenset(), directory=DISTANCE_CACHE_DIR):
+    """
+    Tabella delle distanze per una forma e una disposizione di celle bloccate, condivisa
+    da tutte le ricerche del processo. Se `directory` non è None la matrice è salvata
+    in formato .npy e riaperta in memory-map, così più processi condividono le stesse pagine.
+
+    :return: Un'istanza di DistanceTable.
+    """
+    if directory is None:
+        return DistanceTable(rows, cols, blocked, compute_distance_matrix(rows, cols, blocked))
+
+    path = _cache_path(directory, rows, cols, blocked)
+    if not os.path.exists(path):
+        matrix = compute_distance_matrix(rows, cols, blocked)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp_path, path)
+    return DistanceTable(rows, cols, blocked, np.load(path, mmap_mode='r'))
+
+
+def distance_heuristic(problem):
+    """
+    Euristica ammissibile basata sulle distanze reali (anche con celle bloccate):
+    costo di pittura delle celle mancanti più il massimo, sulle celle da colorare,
+    di distanza(testina, cella) + distanza(cella, partenza), perché ogni cella va raggiunta
+    prima di tornare in start_position.
+
+    :param problem: Un'istanza del problema UniformColoring.
+    :return: Funzione h(state, goal_color=None, color_costs=None), utilizzabile da A* e da ARA*.
+    """
+    table = problem.distances
+    cols = table.cols
+    start = table.index(problem.start_position)
+    to_start = table.from_cell(problem.start_position).astype(np.int64)
+    goal = ord(problem.goal_color)
+    paintable = Grid.from_rows(problem.initial[0]).paintable.ravel()
+    paint_cost = problem.color_costs[problem.goal_color]
+
+    def h(state, goal_color=None, color_costs=None):
+        grid, (x, y) = state
+        head = x * cols + y
+        cells = state_cells(grid)
+        pending = np.flatnonzero((cells != goal) & paintable)
+        if pending.size == 0:
+            return int(table.matrix[head, start])
+        return paint_cost * pending.size + int((table.matrix[head, pending] + to_start[pending]).max())
+
+    return h
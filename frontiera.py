@@ -0,0 +1,108 @@
+import heapq
+from functools import partial
+from itertools import count
+
+
+class HeapFrontier:
+    # Frontiera a heap binario (heapq): le voci sono tuple ordinate a partire dalla priorità
+    def __init__(self):
+        self._heap = []
+        # Metodi legati direttamente alle funzioni C di heapq, senza un frame Python per operazione
+        self.push = partial(heapq.heappush, self._heap)
+        self.pop = partial(heapq.heappop, self._heap)
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class BucketFrontier:
+    """
+    Coda a bucket di Dial per priorità intere non negative (i costi delle azioni sono interi piccoli):
+    push in O(1) e pop in O(1) ammortizzato, senza confronti tra le voci.
+    A parità di priorità le voci escono in ordine LIFO.
+    """
+
+    def __init__(self):
+        self._buckets = []  # indice = priorità
+        self._current = 0   # nessun bucket sotto questo indice contiene voci
+        self._size = 0
+
+    def push(self, entry):
+        priority = entry[0]
+        buckets = self._buckets
+        try:
+            bucket = buckets[priority]
+        except IndexError:
+            if priority < 0:
+                raise ValueError("La coda a bucket richiede priorità non negative.") from None
+            buckets.extend([] for _ in range(priority - len(buckets) + 1))
+            bucket = buckets[priority]
+        except TypeError:
+            raise TypeError("La coda a bucket richiede priorità intere (usare la frontiera 'heap').") from None
+        if priority < self._current:
+            # Succede solo con euristiche non consistenti: la priorità minima torna indietro
+            if priority < 0:
+                raise ValueError("La coda a bucket richiede priorità non negative.")
+            self._current = priority
+        bucket.append(entry)
+        self._size += 1
+
+    def pop(self):
+        if not self._size:
+            raise IndexError("pop da una frontiera vuota")
+        buckets = self._buckets
+        current = self._current
+        while not buckets[current]:
+            current += 1
+        self._current = current
+        self._size -= 1
+        return buckets[current].pop()
+
+    def __len__(self):
+        return self._size
+
+
+FRONTIERS = {
+    'heap': HeapFrontier,
+    'bucket': BucketFrontier,
+}
+
+
+def make_frontier(kind):
+    """
+    :param kind: 'heap' (heapq) oppure 'bucket' (coda di Dial, solo priorità intere).
+    :return: Una frontiera con push(voce), pop() e len(); la priorità è il primo elemento della voce.
+    """
+    try:
+        return FRONTIERS[kind]()
+    except KeyError:
+        raise ValueError(f"Frontiera non riconosciuta: {kind!r}. Scegli tra {', '.join(FRONTIERS)}.") from None
+
+
+# Spareggio a parità di priorità: le voci delle ricerche sono (priorità, chiave di spareggio, contatore, ...)
+# e il contatore di inserimento è unico, quindi heapq non confronta mai gli stati.
+# Politica -> (peso di g, peso di h, passo del contatore): chiave = peso_g * g + peso_h * h.
+# A parità di f = g + h, 'high_g' e 'low_h' danno lo stesso ordine; in UCS (h = 0, f = g) coincidono con 'fifo'.
+TIE_BREAKS = {
+    'fifo': (0, 0, 1),     # prima le voci inserite prima
+    'lifo': (0, 0, -1),    # prima le voci inserite per ultime (in profondità)
+    'high_g': (-1, 0, 1),  # prima il g più alto (più vicino alla soluzione lungo il cammino)
+    'low_h': (0, 1, 1),    # prima la stima residua più bassa
+}
+
+
+def make_tie_break(policy, frontier='heap'):
+    """
+    :param policy: Nome in TIE_BREAKS, oppure None per la politica predefinita della frontiera.
+    :param frontier: 'heap' oppure 'bucket': la coda a bucket ignora la chiave ed è sempre LIFO.
+    :return: (peso di g, peso di h, funzione che restituisce il prossimo valore del contatore).
+    """
+    if policy is None:
+        policy = 'lifo' if frontier == 'bucket' else 'high_g'
+    try:
+        g_weight, h_weight, step = TIE_BREAKS[policy]
+    except KeyError:
+        raise ValueError(f"Spareggio non riconosciuto: {policy!r}. Scegli tra {', '.join(TIE_BREAKS)}.") from None
+    if frontier == 'bucket' and policy != 'lifo':
+        raise ValueError("La coda a bucket estrae sempre in ordine LIFO a parità di priorità (tie_break='lifo').")
+    return g_weight, h_weight, count(0, step).__next__
@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import random
+
+import cv2
+import numpy as np
+
+from benchmark import generate_grid
+
+FONTS = {
+    'simplex': cv2.FONT_HERSHEY_SIMPLEX,
+    'duplex': cv2.FONT_HERSHEY_DUPLEX,
+    'complex': cv2.FONT_HERSHEY_COMPLEX,
+    'triplex': cv2.FONT_HERSHEY_TRIPLEX,
+    'plain': cv2.FONT_HERSHEY_PLAIN,
+}
+
+
+def render_table(grid, cell_size=60, font='simplex', font_scale=1.2, thickness=2, border=2,
+                 noise=0.0, blur=0, skew=0.0, seed=0):
+    """
+    Disegna una griglia di lettere come tabella con bordi, simile alle immagini di prova (es. test_image2.png).
+
+    :param grid: Lista di stringhe con le lettere B/Y/G/T.
+    :param cell_size: Lato di una cella in pixel.
+    :param font: Nome di un font in FONTS.
+    :param font_scale: Scala del font OpenCV.
+    :param thickness: Spessore del tratto delle lettere.
+    :param border: Spessore delle linee della tabella.
+    :param noise: Deviazione standard del rumore gaussiano (0-255).
+    :param blur: Lato del kernel di sfocatura gaussiana (0 = nessuna sfocatura).
+    :param skew: Rotazione in gradi dell'intera immagine.
+    :param seed: Seme per il rumore.
+    :return: Immagine BGR (array uint8).
+    """
+    rows, cols = len(grid), len(grid[0])
+    margin = cell_size // 2
+    height, width = rows * cell_size + 2 * margin, cols * cell_size + 2 * margin
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+
+    # Linee della tabella
+    for r in range(rows + 1):
+        y = margin + r * cell_size
+        cv2.line(image, (margin, y), (margin + cols * cell_size, y), (0, 0, 0), border)
+    for c in range(cols + 1):
+        x = margin + c * cell_size
+        cv2.line(image, (x, margin), (x, margin + rows * cell_size), (0, 0, 0), border)
+
+    # Lettere centrate nelle celle
+    face = FONTS[font]
+    for r, row in enumerate(grid):
+        for c, letter in enumerate(row):
+            (text_w, text_h), _ = cv2.getTextSize(letter, face, font_scale, thickness)
+            x = margin + c * cell_size + (cell_size - text_w) // 2
+            y = margin + r * cell_size + (cell_size + text_h) // 2
+            cv2.putText(image, letter, (x, y), face, font_scale, (0, 0, 0), thickness, cv2.LINE_AA)
+
+    if skew:
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), skew, 1.0)
+        image = cv2.warpAffine(image, matrix, (width, height), borderValue=(255, 255, 255))
+    if blur:
+        kernel = blur if blur % 2 == 1 else blur + 1
+        image = cv2.GaussianBlur(image, (kernel, kernel), 0)
+    if noise:
+        rng = np.random.default_rng(seed)
+        image = np.clip(image + rng.normal(0, noise, image.shape), 0, 255).astype(np.uint8)
+    return image
+
+
+def generate_samples(count, sizes, seed=0, **render_options):
+    """
+    Genera in memoria coppie (immagine, griglia di verità) riproducibili.
+
+    :param count: Numero di immagini.
+    :param sizes: Lista di dimensioni (righe, colonne) tra cui scegliere.
+    :param seed: Seme del generatore.
+    :param render_options: Opzioni passate a render_table (valori singoli o intervalli (min, max)).
+    :return: Generatore di tuple (immagine, griglia, opzioni usate).
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        rows, cols = rng.choice(sizes)
+        grid = generate_grid(rows, cols, seed=f"{seed}-{i}")
+        options = {}
+        for name, value in render_options.items():
+            if isinstance(value, tuple):
+                low, high = value
+                value = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+            options[name] = value
+        options['seed'] = seed + i
+        yield render_table(grid, **options), grid, options
+
+
+def write_dataset(directory, samples):
+    # Salva le immagini PNG e un file verita.json con griglia e parametri di ciascuna
+    os.makedirs(directory, exist_ok=True)
+    ground_truth = {}
+    for i, (image, grid, options) in enumerate(samples):
+        name = f"tabella_{i:04d}.png"
+        cv2.imwrite(os.path.join(directory, name), image)
+        ground_truth[name] = {'grid': grid, 'options': options}
+    with open(os.path.join(directory, 'verita.json'), 'w') as f:
+        json.dump(ground_truth, f, indent=2)
+    return ground_truth
+
+
+def _parse_range(text):
+    # "3" -> 3, "0:2.5" -> (0, 2.5)
+    parse = lambda value: int(value) if value.lstrip('-').isdigit() else float(value)
+    if ':' in text:
+        low, high = text.split(':')
+        return parse(low), parse(high)
+    return parse(text)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generatore di immagini sintetiche di tabelle con verità di riferimento")
+    parser.add_argument('directory')
+    parser.add_argument('--count', type=int, default=50)
+    parser.add_argument('--sizes', nargs='+', default=['3x3', '4x4', '5x6'], help="dimensioni, es. 3x3 4x5")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--font', choices=sorted(FONTS), default='simplex')
+    parser.add_argument('--cell-size', type=_parse_range, default=60, help="valore o intervallo min:max")
+    parser.add_argument('--noise', type=_parse_range, default=0.0)
+    parser.add_argument('--blur', type=_parse_range, default=0)
+    parser.add_argument('--skew', type=_parse_range, default=0.0, help="gradi; per valori negativi usare --skew=-1:1")
+    args = parser.parse_args()
+
+    sizes = [tuple(int(n) for n in size.lower().split('x')) for size in args.sizes]
+    samples = generate_samples(args.count, sizes, seed=args.seed, font=args.font, cell_size=args.cell_size,
+                               noise=args.noise, blur=args.blur, skew=args.skew)
+    write_dataset(args.directory, samples)
+    print(f"Generate {args.count} immagini in {args.directory}")
@@ -0,0 +1,163 @@
+from functools import lru_cache
+
+import numpy as np
+
+from azioni import BLOCKED
+
+START = 'T'
+
+
+@lru_cache(maxsize=None)
+def cell_coordinates(rows, cols):
+    # Coordinate (x, y) di tutte le celle in ordine di riga, condivise per forma
+    xs, ys = np.divmod(np.arange(rows * cols), cols)
+    xs.setflags(write=False)
+    ys.setflags(write=False)
+    return xs, ys
+
+
+def state_cells(grid):
+    # Celle di una griglia di stato (tupla di stringhe) come vettore uint8 dei codici ASCII
+    return np.frombuffer("".join(grid).encode('ascii'), dtype=np.uint8)
+
+
+class Grid:
+    """
+    Griglia di Uniform Coloring su array NumPy: ogni cella è il codice ASCII (uint8) della sua lettera
+    ('B', 'Y', 'G', 'T', 'X'). Le maschere per colore e le coordinate delle celle da colorare
+    sono calcolate una sola volta.
+
+    Si comporta come la sequenza di righe usata dai solutori (len, indice, iterazione, tuple(grid)):
+    lo stato della ricerca resta una tupla di stringhe, che è hashabile.
+    """
+
+    def __init__(self, cells):
+        cells = np.array(cells, dtype=np.uint8)
+        if cells.ndim != 2 or cells.size == 0:
+            raise ValueError("Errore: la griglia deve essere una matrice non vuota.")
+        cells.setflags(write=False)
+        self.cells = cells
+        self._rows = tuple(row.tobytes().decode('ascii') for row in cells)
+        self._masks = {}
+        self._pending = {}
+        self._coordinates = {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        :param rows: Sequenza di stringhe, una per riga (es. il risultato dell'OCR).
+        :return: Un'istanza di Grid.
+        """
+        rows = list(rows)
+        if not rows or not rows[0]:
+            raise ValueError("Errore: griglia vuota.")
+        if any(len(row) != len(rows[0]) for row in rows):
+            raise ValueError("Errore: le righe della griglia hanno lunghezze diverse.")
+        try:
+            data = "".join(rows).encode('ascii')
+        except UnicodeEncodeError:
+            raise ValueError("Errore: caratteri non validi nella griglia.") from None
+        return cls(np.frombuffer(data, dtype=np.uint8).reshape(len(rows), len(rows[0])))
+
+    @property
+    def shape(self):
+        return self.cells.shape
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        return self._rows[index]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __eq__(self, other):
+        if isinstance(other, (Grid, list, tuple)):
+            return self._rows == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Grid({list(self._rows)!r})"
+
+    def mask(self, cell):
+        # Maschera booleana delle celle uguali a `cell`
+        mask = self._masks.get(cell)
+        if mask is None:
+            mask = self._masks[cell] = self.cells == ord(cell)
+            mask.setflags(write=False)
+        return mask
+
+    @property
+    def paintable(self):
+        # Celle colorabili: tutte tranne la 'T' e le celle bloccate
+        mask = self._masks.get(None)
+        if mask is None:
+            mask = self._masks[None] = ~(self.mask(START) | self.mask(BLOCKED))
+            mask.setflags(write=False)
+        return mask
+
+    @property
+    def blocked(self):
+        return frozenset(map(tuple, np.argwhere(self.mask(BLOCKED)).tolist()))
+
+    def pending(self, color):
+        # Celle ancora da colorare per ottenere una griglia uniforme di `color`
+        mask = self._pending.get(color)
+        if mask is None:
+            mask = self._pending[color] = self.paintable & ~self.mask(color)
+            mask.setflags(write=False)
+        return mask
+
+    def pending_coordinates(self, color):
+        # Coordinate (xs, ys) delle celle da colorare
+        coordinates = self._coordinates.get(color)
+        if coordinates is None:
+            coordinates = self._coordinates[color] = np.nonzero(self.pending(color))
+        return coordinates
+
+    def is_uniform(self, color):
+        return not self.pending(color).any()
+
+    def paint_cost(self, color, color_costs, reachable=None):
+        """
+        Costo di pittura per rendere la griglia uniforme di `color`.
+
+        :param reachable: Maschera opzionale delle celle raggiungibili dalla testina (con celle bloccate).
+        """
+        pending = self.pending(color) if reachable is None else self.pending(color) & reachable
+        return int(np.count_nonzero(pending)) * color_costs[color]
+
+    def distances_to_pending(self, color, position):
+        # Distanze di Manhattan dalla posizione a ogni cella da colorare
+        xs, ys = self.pending_coordinates(color)
+        return np.abs(xs - position[0]) + np.abs(ys - position[1])
+
+    def start_position(self):
+        positions = np.argwhere(self.mask(START))
+        if len(positions) == 0:
+            raise ValueError("Errore: 'T' non trovato nella griglia.")
+        elif len(positions) > 1:
+            raise ValueError("Errore: Più di una testina ('T') trovata nella griglia.")
+        return tuple(positions[0].tolist())
+
+
+def as_grid(grid):
+    return grid if isinstance(grid, Grid) else Grid.from_rows(grid)
+
+
+def improved_heuristic_vector(state, goal_color, color_costs):
+    """
+    Versione vettoriale di uniformcoloring.improved_heuristic, conveniente sulle griglie grandi:
+    costo di pittura delle celle mancanti più la distanza massima dalla testina a una di esse.
+    """
+    grid, (tx, ty) = state
+    cells = state_cells(grid)
+    pending = (cells != ord(goal_color)) & (cells != ord(START)) & (cells != ord(BLOCKED))
+    count = int(np.count_nonzero(pending))
+    if not count:
+        return 0
+    xs, ys = cell_coordinates(len(grid), len(grid[0]))
+    return count * color_costs[goal_color] + int((np.abs(xs[pending] - tx) + np.abs(ys[pending] - ty)).max())
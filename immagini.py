@@ -0,0 +1,189 @@
+import cv2
+import numpy as np
+import pytesseract
+
+from cacheocr import decode_image, pipeline_key
+from griglia import Grid
+from profilazione import active_profiler
+
+# Altezza delle celle (in pixel) a cui viene riportata ogni immagine prima della morfologia e dell'OCR:
+# i kernel di remove_table_borders (25 px) sono tarati su celle di circa 60 px, come nelle immagini di prova
+TARGET_CELL_HEIGHT = 60
+# Opzioni di Tesseract per le tabelle di lettere (anche per l'OCR a mosaico di mosaico.py)
+OCR_CONFIG = r'--oem 3 --psm 6'
+# Lato minimo della copia ridotta su cui si stima l'altezza delle celle
+_ESTIMATE_SIDE = 800
+
+
+def read_image(image_path, profiler=None):
+    """
+    Legge e decodifica un file immagine una sola volta.
+
+    :param profiler: profilazione.StageProfiler opzionale (fasi 'read' e 'decode').
+    :return: (byte del file, immagine decodificata): i byte servono come chiave della cache OCR.
+    """
+    profiler = active_profiler(profiler)
+    with profiler.stage('read'):
+        with open(image_path, 'rb') as f:
+            data = f.read()
+    with profiler.stage('decode'):
+        image = decode_image(data)
+    if image is None:
+        raise ValueError(f"Errore: impossibile decodificare l'immagine {image_path}.")
+    return data, image
+
+
+def _shrink(image, scale):
+    # Riduzione con la piramide gaussiana (dimezzamenti veloci) e INTER_AREA solo per l'ultimo fattore
+    while scale <= 0.5:
+        image = cv2.pyrDown(image)
+        scale *= 2
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+
+
+def _line_spacing(mask, axis):
+    # Distanza mediana tra le linee della tabella lungo un asse (proiezione della maschera delle linee)
+    counts = np.count_nonzero(mask, axis=axis)
+    if not counts.any():
+        return None
+    threshold = (np.median(counts[counts > 0]) + counts.max()) / 2
+    lines = np.flatnonzero(counts > threshold)
+    groups = np.split(lines, np.flatnonzero(np.diff(lines) > 1) + 1)
+    if len(groups) < 2:
+        return None
+    return float(np.median(np.diff([group.mean() for group in groups])))
+
+
+def estimate_cell_height(image):
+    """
+    Stima l'altezza delle celle dalla struttura della tabella: la componente connessa più grande
+    sono le linee della griglia, la cui proiezione sulle righe ha un picco per ogni linea orizzontale.
+    La stima è fatta su una copia ridotta, quindi costa poco anche sulle foto ad alta risoluzione.
+
+    :return: Altezza in pixel nella risoluzione originale, oppure None se la tabella non è riconoscibile.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    # Solo dimezzamenti, finché il lato maggiore resta almeno _ESTIMATE_SIDE: le linee sottili non spariscono
+    while max(gray.shape) >= 2 * _ESTIMATE_SIDE:
+        gray = cv2.pyrDown(gray)
+    factor = gray.shape[0] / image.shape[0]
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count < 2:
+        return None
+    largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    height = _line_spacing(labels == largest, axis=1)
+    if height is None:
+        return None
+    # Una cella contiene una lettera: una stima più bassa delle lettere non viene da una tabella
+    others = np.delete(stats[1:], largest - 1, axis=0)
+    letters = others[others[:, cv2.CC_STAT_AREA] >= 10, cv2.CC_STAT_HEIGHT]
+    if len(letters) and height < 1.2 * float(np.median(letters)):
+        return None
+    return height / factor
+
+
+def normalize_resolution(image, target_cell_height=TARGET_CELL_HEIGHT):
+    """
+    Riscala l'immagine in modo che le celle siano alte circa target_cell_height pixel:
+    il costo della morfologia e dell'OCR dipende dalla dimensione della griglia, non dalla risoluzione della foto.
+    Se l'altezza delle celle non si può stimare (o è già vicina all'obiettivo) l'immagine resta invariata.
+    """
+    cell_height = estimate_cell_height(image)
+    if cell_height is None:
+        return image
+    scale = target_cell_height / cell_height
+    if abs(scale - 1.0) < 0.1:
+        return image
+    if scale < 1.0:
+        return _shrink(image, scale)
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+
+# Funzioni per elaborazione delle immagini e acquisizione della griglia
+def remove_table_borders(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, binary_image = cv2.threshold(gray, 128, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 1))
+    remove_horizontal = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
+
+    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 25))
+    remove_vertical = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+
+    borders_removed = binary_image - remove_horizontal - remove_vertical
+    borders_removed = cv2.bitwise_not(borders_removed)
+    return borders_removed
+
+def extract_and_organize_text(image):
+    text = pytesseract.image_to_string(image, config=OCR_CONFIG)
+    
+    lines = text.splitlines()
+    cleaned_lines = [line.strip() for line in lines if line.strip()]
+    return cleaned_lines
+
+def extract_grid_with_confidences(image):
+    # Come extract_and_organize_text, ma raccoglie anche la confidenza di Tesseract per ogni cella
+    data = pytesseract.image_to_data(image, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+
+    lines = {}
+    for text, conf, block, par, line in zip(data['text'], data['conf'], data['block_num'], data['par_num'], data['line_num']):
+        text = text.strip()
+        if not text:
+            continue
+        row, row_confidences = lines.setdefault((block, par, line), ([], []))
+        row.append(text)
+        row_confidences.extend([float(conf)] * len(text))  # una confidenza per ogni lettera
+
+    grid = ["".join(row) for row, _ in lines.values()]
+    confidences = [row_confidences for _, row_confidences in lines.values()]
+    return grid, confidences
+
+def process_image_to_grid(image_path=None, cache=None, image=None, data=None, target_cell_height=TARGET_CELL_HEIGHT,
+                          profiler=None):
+    """
+    Acquisisce la griglia da un'immagine. Il file viene letto e decodificato al più una volta:
+    chi ha già i byte (data) o l'immagine decodificata (image) li passa e il percorso non viene riaperto.
+
+    :param image_path: Percorso del file (non serve se sono dati `data` o, senza cache, `image`).
+    :param cache: OCRCache opzionale, indicizzata dai byte del file e dalla configurazione della pipeline.
+    :param target_cell_height: Altezza delle celle dopo la normalizzazione (None = risoluzione originale).
+    :param profiler: profilazione.StageProfiler opzionale: fasi 'read', 'decode', 'normalize_resolution',
+                     'remove_table_borders' e 'ocr' (con la cache, solo quelle effettivamente eseguite).
+    :return: Un'istanza di griglia.Grid.
+    :raises ValueError: Se i byte del file non si possono decodificare come immagine.
+    """
+    profiler = active_profiler(profiler)
+
+    def read():
+        with profiler.stage('read'):
+            with open(image_path, 'rb') as f:
+                return f.read()
+
+    def decode(data):
+        with profiler.stage('decode'):
+            image = decode_image(data)
+        if image is None:
+            raise ValueError(f"Errore: impossibile decodificare l'immagine {image_path}.")
+        return image
+
+    def recognize(image):
+        with profiler.stage('normalize_resolution'):
+            image = normalize_resolution(image, target_cell_height) if target_cell_height else image
+        with profiler.stage('remove_table_borders'):
+            processed_image = remove_table_borders(image)
+        with profiler.stage('ocr'):
+            return extract_grid_with_confidences(processed_image)
+
+    # Senza cache: stesso riconoscimento, senza cercare né salvare il risultato
+    if cache is None:
+        if image is None:
+            image = decode(read() if data is None else data)
+        grid, _ = recognize(image)
+        return Grid.from_rows(grid)
+
+    # Con cache: servono solo i byte del file, la decodifica e l'OCR avvengono solo se necessari
+    if data is None:
+        data = read()
+    pipeline = pipeline_key('image_to_data', OCR_CONFIG, target_cell_height)
+    grid, _ = cache.fetch(data, pipeline, decode, recognize, image=image)
+    return Grid.from_rows(grid)
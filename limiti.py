@@ -0,0 +1,133 @@
+import sys
+import threading
+import time
+
+
+class CancellationToken:
+    # Annullamento cooperativo: può essere impostato da un altro thread (GUI, Ctrl+C nella CLI)
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+def estimate_state_bytes(state):
+    """
+    Stima l'occupazione in memoria di uno stato (griglia, posizione) e della sua voce in frontiera.
+
+    :param state: Lo stato rappresentato come (griglia, posizione_testina).
+    :return: Numero approssimativo di byte.
+    """
+    grid, position = state
+    size = sys.getsizeof(state) + sys.getsizeof(grid) + sys.getsizeof(position)
+    size += sum(sys.getsizeof(row) for row in grid)
+    return size + 64  # tupla della frontiera e voce del dizionario degli esplorati
+
+
+class SearchBudget:
+    def __init__(self, time_limit=None, max_expansions=None, max_bytes=None, token=None):
+        """
+        Limiti di risorse per una ricerca. I limiti a None non vengono controllati.
+
+        :param time_limit: Tempo massimo in secondi.
+        :param max_expansions: Numero massimo di nodi espansi.
+        :param max_bytes: Memoria massima (stimata) per frontiera e insieme chiuso, in byte.
+        :param token: CancellationToken per l'annullamento da parte dell'utente.
+        """
+        self.time_limit = time_limit
+        self.max_expansions = max_expansions
+        self.max_bytes = max_bytes
+        self.token = token
+        self._deadline = None
+        self._entry_bytes = 0
+
+    def start(self, problem):
+        self._deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        self._entry_bytes = estimate_state_bytes(problem.initial) if self.max_bytes is not None else 0
+        return self
+
+    def exhausted(self, expansions, stored_entries):
+        """
+        Verifica i limiti; va chiamata a ogni espansione.
+
+        :param expansions: Nodi espansi finora.
+        :param stored_entries: Voci attualmente memorizzate (frontiera + insieme chiuso).
+        :return: Il motivo dell'esaurimento ('annullata', 'espansioni', 'tempo', 'memoria') oppure None.
+        """
+        if self.token is not None and self.token.cancelled:
+            return 'annullata'
+        if self.max_expansions is not None and expansions >= self.max_expansions:
+            return 'espansioni'
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            return 'tempo'
+        if self.max_bytes is not None and stored_entries * self._entry_bytes >= self.max_bytes:
+            return 'memoria'
+        return None
+
+
+class BudgetExhausted:
+    # Risultato di una ricerca interrotta da un limite: è falso in un contesto booleano
+    def __init__(self, reason, lower_bound, stats=None):
+        """
+        :param reason: Motivo dell'interruzione (vedi SearchBudget.exhausted).
+        :param lower_bound: Miglior limite inferiore noto sul costo ottimo.
+        :param stats: Statistiche parziali della ricerca.
+        """
+        self.reason = reason
+        self.lower_bound = lower_bound
+        self.stats = stats
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return f"BudgetExhausted(reason={self.reason!r}, lower_bound={self.lower_bound!r})"
+
+    def summary(self):
+        reasons = {
+            'annullata': "ricerca annullata",
+            'espansioni': "limite di nodi espansi raggiunto",
+            'tempo': "limite di tempo raggiunto",
+            'memoria': "limite di memoria raggiunto",
+        }
+        lines = [f"Ricerca interrotta: {reasons.get(self.reason, self.reason)}",
+                 f"Limite inferiore sul costo ottimo: {self.lower_bound}"]
+        if self.stats is not None:
+            lines.append(self.stats.summary())
+        return "\n".join(lines)
+
+
+def run_with_interrupt(search, token):
+    """
+    Esegue una ricerca in un thread separato; Ctrl+C annulla la ricerca tramite il token
+    invece di interrompere il programma, così si ottengono comunque le statistiche parziali.
+
+    :param search: Funzione senza argomenti che esegue la ricerca.
+    :param token: Il CancellationToken passato al SearchBudget della ricerca.
+    :return: Il risultato della ricerca.
+    :raises Exception: L'eccezione sollevata dalla ricerca nel thread, rilanciata nel chiamante.
+    """
+    result = []
+    error = []
+
+    def run():
+        try:
+            result.append(search())
+        except BaseException as e:
+            error.append(e)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    while worker.is_alive():
+        try:
+            worker.join(0.1)
+        except KeyboardInterrupt:
+            token.cancel()
+    if error:
+        raise error[0]
+    return result[0]
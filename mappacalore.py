@@ -0,0 +1,127 @@
+import csv
+import math
+import os
+
+from azioni import BLOCKED
+
+# Mappa delle espansioni: quante volte la testina si trovava su ogni cella negli stati espansi,
+# e quante espansioni per numero di celle ancora da colorare. Le zone calde della mappa e i picchi
+# dell'istogramma mostrano dove l'euristica non distingue gli stati (molti stati con la stessa f).
+
+
+class ExpansionHeatmap:
+    def __init__(self, problem):
+        """
+        :param problem: Il problema UniformColoring su cui gira la ricerca.
+        """
+        grid, _ = problem.initial
+        self.grid = tuple(grid)
+        self.goal_color = problem.goal_color
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.counts = [0] * (self.rows * self.cols)  # espansioni per posizione della testina, in ordine di riga
+        self.by_remaining = {}                       # celle ancora da colorare -> espansioni
+        self._paintable = sum(len(row) - row.count('T') - row.count(BLOCKED) for row in grid)
+        # Ultima griglia vista e celle che le restano da colorare: gli stati espansi uno dopo l'altro
+        # condividono spesso la griglia (cambia solo la posizione), quindi il conteggio non si ripete
+        self._last_grid = None
+        self._last_remaining = 0
+
+    def record(self, state):
+        # Chiamata dai motori di ricerca a ogni espansione: aggiorna i conteggi senza conservare lo stato
+        grid, (x, y) = state
+        self.counts[x * self.cols + y] += 1
+        if grid is not self._last_grid:
+            self._last_grid = grid
+            self._last_remaining = self._paintable - sum(row.count(self.goal_color) for row in grid)
+        remaining = self._last_remaining
+        self.by_remaining[remaining] = self.by_remaining.get(remaining, 0) + 1
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    def count(self, x, y):
+        return self.counts[x * self.cols + y]
+
+    def heat(self, x, y):
+        """
+        :return: Intensità in [0, 1] della cella, in scala logaritmica (i conteggi variano di ordini di grandezza).
+        """
+        peak = max(self.counts)
+        if not peak:
+            return 0.0
+        return math.log1p(self.count(x, y)) / math.log1p(peak)
+
+    def color(self, x, y):
+        # Colore della cella: bianco (nessuna espansione), giallo, rosso (massimo), come (r, g, b)
+        heat = self.heat(x, y)
+        if heat < 0.5:
+            return 255, 255, round(255 * (1 - 2 * heat))
+        return 255, round(255 * (2 - 2 * heat)), 0
+
+    def histogram(self):
+        # Coppie (celle rimanenti, espansioni) in ordine decrescente di celle rimanenti (ordine della ricerca)
+        return sorted(self.by_remaining.items(), reverse=True)
+
+    def summary(self):
+        total = self.total
+        lines = [f"Espansioni per posizione della testina (totale {total}):"]
+        width = len(str(max(self.counts, default=0)))
+        for x in range(self.rows):
+            lines.append("  " + " ".join(f"{self.count(x, y):>{width}}" for y in range(self.cols)))
+        lines.append("Espansioni per celle ancora da colorare:")
+        for remaining, count in self.histogram():
+            share = count / total if total else 0.0
+            lines.append(f"  {remaining:>4} {count:>10} {share:6.1%} {'#' * round(share * 40)}")
+        return "\n".join(lines)
+
+    def write_csv(self, path):
+        """
+        Salva la mappa come matrice CSV (una riga per riga della griglia) e l'istogramma
+        nel file accanto con suffisso '_rimanenti.csv'.
+
+        :return: Percorso del file dell'istogramma.
+        """
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            for x in range(self.rows):
+                writer.writerow([self.count(x, y) for y in range(self.cols)])
+        histogram_path = f"{os.path.splitext(path)[0]}_rimanenti.csv"
+        with open(histogram_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['celle_rimanenti', 'espansioni'])
+            writer.writerows(self.histogram())
+        return histogram_path
+
+    def render(self, cell_size=48):
+        """
+        Immagine BGR della mappa: ogni cella colorata per intensità, con la sua lettera e il conteggio
+        (OpenCV viene importato solo qui).
+        """
+        import cv2
+        import numpy as np
+        image = np.full((self.rows * cell_size, self.cols * cell_size, 3), 255, dtype=np.uint8)
+        for x in range(self.rows):
+            for y in range(self.cols):
+                top, left = x * cell_size, y * cell_size
+                r, g, b = self.color(x, y)
+                cv2.rectangle(image, (left, top), (left + cell_size - 1, top + cell_size - 1), (b, g, r), -1)
+                cv2.rectangle(image, (left, top), (left + cell_size - 1, top + cell_size - 1), (128, 128, 128), 1)
+                cv2.putText(image, self.grid[x][y], (left + 4, top + cell_size // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                            cell_size / 80, (0, 0, 0), 1, cv2.LINE_AA)
+                cv2.putText(image, str(self.count(x, y)), (left + 4, top + cell_size - 6), cv2.FONT_HERSHEY_SIMPLEX,
+                            cell_size / 160, (0, 0, 0), 1, cv2.LINE_AA)
+        return image
+
+    def export(self, path):
+        """
+        Esporta la mappa: CSV se il file termina con '.csv' (più l'istogramma), altrimenti immagine.
+
+        :return: Lista dei file scritti.
+        """
+        if path.lower().endswith('.csv'):
+            return [path, self.write_csv(path)]
+        import cv2
+        if not cv2.imwrite(path, self.render()):
+            raise ValueError(f"Errore: impossibile salvare l'immagine {path}.")
+        return [path]
@@ -0,0 +1,177 @@
+import argparse
+import json
+from bisect import bisect_right
+
+import numpy as np
+import pytesseract
+
+from cacheocr import OCRCache, decode_image, pipeline_key
+from immagini import OCR_CONFIG, TARGET_CELL_HEIGHT, normalize_resolution, remove_table_borders
+from profilazione import StageProfiler, active_profiler
+
+# Riconoscimento in blocco: molte tabelle già ripulite dai bordi vengono impilate in una sola pagina,
+# separate da fasce bianche, e lette con una sola chiamata a Tesseract. Le parole riconosciute
+# tornano all'immagine di origine tramite la coordinata verticale del loro riquadro.
+
+
+def build_montage(images, gap=60, margin=20):
+    """
+    Impila verticalmente immagini in scala di grigi (sfondo bianco) in un'unica pagina.
+
+    :param images: Immagini prodotte da remove_table_borders.
+    :param gap: Altezza in pixel della fascia bianca tra due immagini (separa le righe di testo).
+    :param margin: Margine bianco attorno alla pagina.
+    :return: (pagina, lista di (inizio, fine) verticali di ogni immagine nella pagina).
+    """
+    width = max(image.shape[1] for image in images) + 2 * margin
+    height = sum(image.shape[0] for image in images) + gap * (len(images) - 1) + 2 * margin
+    page = np.full((height, width), 255, dtype=np.uint8)
+    spans = []
+    top = margin
+    for image in images:
+        bottom = top + image.shape[0]
+        page[top:bottom, margin:margin + image.shape[1]] = image
+        spans.append((top, bottom))
+        top = bottom + gap
+    return page, spans
+
+
+def split_montage(data, spans):
+    """
+    Riassegna le parole riconosciute sulla pagina alle immagini di origine.
+
+    :param data: Risultato di pytesseract.image_to_data (Output.DICT) sulla pagina.
+    :param spans: Intervalli verticali restituiti da build_montage.
+    :return: Lista di (griglia, confidenze) per immagine, come immagini.extract_grid_with_confidences.
+    """
+    tops = [top for top, _ in spans]
+    lines = [{} for _ in spans]  # per immagine: riga di Tesseract -> parole (sinistra, testo, confidenza)
+    for text, conf, left, top, height, block, par, line in zip(
+            data['text'], data['conf'], data['left'], data['top'], data['height'],
+            data['block_num'], data['par_num'], data['line_num']):
+        text = text.strip()
+        if not text:
+            continue
+        center = top + height / 2
+        index = bisect_right(tops, center) - 1
+        if index < 0 or center >= spans[index][1]:
+            continue  # rumore nelle fasce di separazione
+        lines[index].setdefault((block, par, line), []).append((left, top, text, float(conf)))
+
+    results = []
+    for image_lines in lines:
+        # Righe dall'alto verso il basso, parole da sinistra a destra
+        ordered = sorted(image_lines.values(), key=lambda words: min(word[1] for word in words))
+        grid, confidences = [], []
+        for words in ordered:
+            words.sort()
+            grid.append("".join(text for _, _, text, _ in words))
+            confidences.append([conf for _, _, text, conf in words for _ in text])  # una confidenza per lettera
+        results.append((grid, confidences))
+    return results
+
+
+def _pages(images, max_height, gap, margin):
+    # Gruppi consecutivi di immagini la cui pagina non supera max_height pixel
+    page, height = [], 2 * margin
+    for index, image in enumerate(images):
+        extra = image.shape[0] + (gap if page else 0)
+        if page and height + extra > max_height:
+            yield page
+            page, height = [], 2 * margin
+            extra = image.shape[0]
+        page.append(index)
+        height += extra
+    if page:
+        yield page
+
+
+def recognize_montage(processed_images, max_height=12000, gap=60, margin=20, profiler=None):
+    """
+    Riconosce molte tabelle con una chiamata a Tesseract per pagina (al più max_height pixel di altezza).
+
+    :param processed_images: Immagini prodotte da remove_table_borders.
+    :param profiler: profilazione.StageProfiler opzionale (fasi 'montage', 'ocr' e 'split').
+    :return: Lista di (griglia, confidenze), nello stesso ordine delle immagini.
+    """
+    profiler = active_profiler(profiler)
+    results = [None] * len(processed_images)
+    for indices in _pages(processed_images, max_height, gap, margin):
+        with profiler.stage('montage'):
+            page, spans = build_montage([processed_images[i] for i in indices], gap, margin)
+        with profiler.stage('ocr'):
+            data = pytesseract.image_to_data(page, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+        with profiler.stage('split'):
+            split = split_montage(data, spans)
+        for i, result in zip(indices, split):
+            results[i] = result
+    return results
+
+
+def ingest_images(paths, cache=None, max_height=12000, target_cell_height=TARGET_CELL_HEIGHT, profiler=None):
+    """
+    Acquisizione in blocco di molte immagini di griglie: le immagini già in cache (con la stessa configurazione
+    della pipeline) non vengono decodificate, le altre sono riportate alla stessa altezza delle celle e passano per remove_table_borders
+    e per l'OCR a mosaico; i risultati vengono salvati in cache.
+
+    :param paths: Percorsi delle immagini.
+    :param cache: OCRCache opzionale.
+    :param profiler: profilazione.StageProfiler opzionale: le fasi di ogni immagine si accumulano.
+    :return: Lista di (griglia come lista di righe, confidenze), nello stesso ordine dei percorsi.
+    """
+    profiler = active_profiler(profiler)
+    pipeline = pipeline_key('mosaico', OCR_CONFIG, target_cell_height)
+    results = [None] * len(paths)
+    missing = []  # (indice, byte del file, immagine decodificata)
+    for index, path in enumerate(paths):
+        with profiler.stage('read'):
+            with open(path, 'rb') as f:
+                data = f.read()
+        with profiler.stage('cache'):
+            entry = cache.lookup(data, pipeline) if cache is not None else None
+        if entry is None:
+            with profiler.stage('decode'):
+                image = decode_image(data)
+            if image is None:
+                raise ValueError(f"Errore: impossibile decodificare l'immagine {path}.")
+            missing.append((index, data, image))
+            continue
+        results[index] = (entry['grid'], entry['confidences'])
+
+    if missing:
+        images = [image for _, _, image in missing]
+        if target_cell_height:
+            images = [profiler.wrap('normalize_resolution', normalize_resolution)(image, target_cell_height) for image in images]
+        processed = [profiler.wrap('remove_table_borders', remove_table_borders)(image) for image in images]
+        recognized = recognize_montage(processed, max_height, profiler=profiler)
+        for (index, data, image), (grid, confidences) in zip(missing, recognized):
+            if cache is not None:
+                cache.store(data, pipeline, grid, confidences)
+            results[index] = (grid, confidences)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Acquisizione OCR in blocco di molte immagini di griglie (una pagina a mosaico)")
+    parser.add_argument('images', nargs='+')
+    parser.add_argument('--max-height', type=int, default=12000, help="altezza massima in pixel di una pagina")
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--output', help="file JSON con griglie e confidenze (altrimenti stampa le griglie)")
+    parser.add_argument('--profile', action='store_true', help="tempi per fase (nel JSON sotto '_profilo' e a video)")
+    args = parser.parse_args()
+
+    profiler = StageProfiler() if args.profile else None
+    results = ingest_images(args.images, cache=None if args.no_cache else OCRCache(), max_height=args.max_height,
+                            profiler=profiler)
+    if args.output:
+        report = {path: {'grid': grid, 'confidences': confidences} for path, (grid, confidences) in zip(args.images, results)}
+        if profiler is not None:
+            report['_profilo'] = profiler.as_dict()
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Risultati salvati in {args.output}")
+    else:
+        for path, (grid, _) in zip(args.images, results):
+            print(f"{path}: {' '.join(grid)}")
+    if profiler is not None:
+        print(profiler.summary())
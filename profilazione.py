@@ -0,0 +1,135 @@
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class StageProfiler:
+    """
+    Tempi per fase della pipeline immagine -> griglia -> soluzione (es. 'decode', 'ocr', 'search'),
+    con cattura opzionale di cProfile e del picco di memoria (tracemalloc) per ogni fase.
+    Una fase eseguita più volte accumula chiamate e durata.
+
+    Le fasi possono essere annidate: cProfile e tracemalloc seguono solo la fase più esterna,
+    perché un secondo profilo attivo o un reset del picco falserebbero la misura della fase che la contiene.
+    """
+
+    def __init__(self, cprofile=False, memory=False, top=10):
+        """
+        :param cprofile: Se True, raccoglie un profilo cProfile per fase.
+        :param memory: Se True, misura con tracemalloc il picco di memoria allocata in ogni fase.
+        :param top: Funzioni riportate per fase nel riepilogo del profilo.
+        """
+        self.cprofile = cprofile
+        self.memory = memory
+        self.top = top
+        self.stages = {}     # nome -> {'calls', 'duration', 'peak_memory'}
+        self._profiles = {}  # nome -> pstats.Stats
+        self._depth = 0
+
+    @contextmanager
+    def stage(self, name):
+        outer = self._depth == 0
+        self._depth += 1
+        profile = cProfile.Profile() if self.cprofile and outer else None
+        started_tracing = False
+        if self.memory and outer:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        if profile is not None:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+            self._depth -= 1
+            record = self.stages.setdefault(name, {'calls': 0, 'duration': 0.0, 'peak_memory': None})
+            record['calls'] += 1
+            record['duration'] += duration
+            if self.memory and outer:
+                # La ricerca con le statistiche azzera anch'essa il picco: si misura quello rimasto più alto
+                peak = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+                record['peak_memory'] = max(peak, record['peak_memory'] or 0)
+                if started_tracing:
+                    tracemalloc.stop()
+            if profile is not None:
+                if name in self._profiles:
+                    self._profiles[name].add(profile)
+                else:
+                    self._profiles[name] = pstats.Stats(profile)
+
+    def discard(self, *names):
+        # Dimentica le misure delle fasi indicate (es. prima di ripetere la ricerca sulla stessa immagine)
+        for name in names:
+            self.stages.pop(name, None)
+            self._profiles.pop(name, None)
+
+    def wrap(self, name, function):
+        # Funzione che esegue `function` come fase `name` (es. per le callback della cache OCR)
+        def wrapped(*args, **kwargs):
+            with self.stage(name):
+                return function(*args, **kwargs)
+        return wrapped
+
+    def top_functions(self, name):
+        """
+        :return: Le funzioni più costose della fase (tempo cumulativo), se cProfile era attivo.
+        """
+        stats = self._profiles.get(name)
+        if stats is None:
+            return []
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+        return [{'function': f"{filename}:{line}({function})", 'calls': calls, 'total': total, 'cumulative': cumulative}
+                for (filename, line, function), (_, calls, total, cumulative, _) in rows]
+
+    def as_dict(self):
+        total = sum(record['duration'] for record in self.stages.values())
+        stages = {}
+        for name, record in self.stages.items():
+            stages[name] = dict(record, share=record['duration'] / total if total else None)
+            if self.cprofile:
+                stages[name]['top_functions'] = self.top_functions(name)
+        return {'total': total, 'stages': stages}
+
+    def summary(self):
+        report = self.as_dict()
+        lines = [f"Profilo per fase (totale {report['total']:.3f} secondi):"]
+        for name, record in report['stages'].items():
+            share = f"{record['share']:6.1%}" if record['share'] is not None else "   n/d"
+            memory = f", picco {record['peak_memory'] / 1024:.1f} KiB" if record['peak_memory'] is not None else ""
+            calls = f" ({record['calls']} chiamate)" if record['calls'] > 1 else ""
+            lines.append(f"  {name:<22} {record['duration'] * 1000:10.2f} ms {share}{calls}{memory}")
+            for function in record.get('top_functions', [])[:5]:
+                lines.append(f"      {function['cumulative'] * 1000:9.2f} ms  {function['function']}")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+class _NullProfiler:
+    # Profilazione disattivata: ogni fase è lo stesso contesto vuoto, senza orologi né allocazioni
+    _stage = nullcontext()
+
+    def stage(self, name):
+        return self._stage
+
+    def wrap(self, name, function):
+        return function
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def active_profiler(profiler):
+    # I parametri profiler=None delle funzioni della pipeline diventano il profiler nullo
+    return NULL_PROFILER if profiler is None else profiler
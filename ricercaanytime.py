@@ -0,0 +1,160 @@
+import heapq
+import time
+from itertools import count
+
+from azioni import ACTION_NAMES
+from limiti import BudgetExhausted
+from statistiche import SearchStats, finish_search
+
+
+def _reconstruct_path(parents, state):
+    path = []
+    while parents[state] is not None:
+        state, code = parents[state]
+        path.append(ACTION_NAMES[code])
+    path.reverse()
+    return path
+
+
+def anytime_a_star_search(problem, heuristic, deadline=None, initial_weight=3.0, weight_step=0.5,
+                          on_solution=None, return_stats=False, budget=None, heatmap=None, track_memory=False):
+    """
+    Ricerca anytime (ARA*): trova rapidamente una soluzione con A* pesato e poi la migliora
+    riducendo il peso, riutilizzando i valori g già calcolati, fino alla scadenza o all'ottimo.
+
+    :param problem: Un'istanza del problema UniformColoring.
+    :param heuristic: Euristica ammissibile come per a_star_search_optimized: (stato, colore obiettivo, costi)
+                      -> stima del costo residuo (es. improved_heuristic).
+    :param deadline: Tempo massimo in secondi (None = continua fino alla soluzione ottima).
+    :param initial_weight: Peso iniziale dell'euristica (f = g + w * h).
+    :param weight_step: Riduzione del peso tra un'iterazione e la successiva.
+    :param on_solution: Funzione chiamata a ogni soluzione migliorata con (percorso, costo, bound, secondi trascorsi),
+                        dove bound è il fattore di sub-ottimalità garantito (1.0 = ottima).
+    :param return_stats: Se True, restituisce anche le statistiche (con il campo suboptimality_bound).
+    :param budget: SearchBudget opzionale; se si esaurisce viene restituita la migliore soluzione trovata.
+    :param heatmap: mappacalore.ExpansionHeatmap opzionale: somma le espansioni di tutte le iterazioni.
+    :param track_memory: Se True, le statistiche includono il picco di memoria (tracemalloc, rallenta la ricerca).
+    :return: (percorso, costo, passaggi) della migliore soluzione trovata, None se il problema non ha soluzione,
+             oppure BudgetExhausted se la scadenza o un limite arrivano prima di trovare una soluzione.
+    """
+    stats = SearchStats("ARA*", track_memory=track_memory).start()
+    if budget is not None:
+        budget.start(problem)
+    result = _anytime_search(problem, heuristic, deadline, initial_weight, weight_step, on_solution, stats, budget, heatmap)
+    return finish_search(stats, result, return_stats)
+
+
+def _anytime_search(problem, heuristic, deadline, weight, weight_step, on_solution, stats, budget, heatmap):
+    start_time = time.perf_counter()
+    end_time = start_time + deadline if deadline is not None else None
+
+    initial = problem.initial
+    g = {initial: 0}
+    parents = {initial: None}
+    h_values = {}  # l'euristica di ogni stato viene calcolata una sola volta per tutte le iterazioni
+    goal_color, color_costs = problem.goal_color, problem.color_costs
+
+    def h(state):
+        value = h_values.get(state)
+        if value is None:
+            value = h_values[state] = heuristic(state, goal_color, color_costs)
+        return value
+
+    best_state, best_cost = None, float('inf')
+    if problem.goal_test(initial):
+        best_state, best_cost = initial, 0
+
+    # (chiave, g, contatore, stato): il contatore di inserimento evita i confronti tra stati a parità di chiave e g
+    counter = count().__next__
+    frontier = [(weight * h(initial), 0, counter(), initial)]
+    stats.nodes_generated += 1
+    closed = set()
+    # Stati migliorati dopo essere stati espansi nell'iterazione corrente (dizionario: l'ordine di inserimento
+    # decide il contatore quando tornano in frontiera, quindi la ricerca è riproducibile)
+    inconsistent = {}
+
+    def improve_path():
+        # Restituisce il motivo dell'interruzione (scadenza o limite), None se l'iterazione è completa
+        nonlocal best_state, best_cost
+        while frontier and frontier[0][0] < best_cost:
+            if len(frontier) > stats.peak_frontier:
+                stats.peak_frontier = len(frontier)
+            entry = heapq.heappop(frontier)
+            key, cost, _, state = entry
+            if cost != g[state] or state in closed:
+                stats.stale_pops += 1
+                continue
+
+            if budget is not None:
+                reason = budget.exhausted(stats.nodes_expanded, len(frontier) + len(g))
+                if reason is not None:
+                    heapq.heappush(frontier, entry)  # resta aperto per il limite inferiore
+                    return reason
+
+            closed.add(state)
+            stats.nodes_expanded += 1
+            if heatmap is not None:
+                heatmap.record(state)
+            if len(g) > stats.peak_closed:
+                stats.peak_closed = len(g)
+            if end_time is not None and stats.nodes_expanded % 64 == 0 and time.perf_counter() > end_time:
+                return 'tempo'
+
+            for code, child, step_cost in problem.successors(state):
+                new_cost = cost + step_cost
+                stats.nodes_generated += 1
+                if new_cost < g.get(child, float('inf')):
+                    g[child] = new_cost
+                    parents[child] = (state, code)
+                    if new_cost < best_cost and problem.goal_test(child):
+                        best_state, best_cost = child, new_cost
+                    if child in closed:
+                        inconsistent[child] = None
+                    else:
+                        heapq.heappush(frontier, (new_cost + weight * h(child), new_cost, counter(), child))
+        return None
+
+    def lower_bound():
+        # Limite inferiore sull'ottimo: min g + h sugli stati ancora aperti o inconsistenti
+        candidates = [cost + h(state) for _, cost, _, state in frontier if cost == g[state] and state not in closed]
+        candidates += [g[state] + h(state) for state in inconsistent]
+        return min(candidates, default=best_cost)
+
+    reported_cost = None
+    while True:
+        interrupted = improve_path()
+
+        if best_state is not None:
+            bound = 1.0 if best_cost == 0 else max(1.0, min(weight, best_cost / max(lower_bound(), 1e-9)))
+            stats.suboptimality_bound = bound
+            if best_cost != reported_cost and on_solution is not None:
+                on_solution(_reconstruct_path(parents, best_state), best_cost, bound, time.perf_counter() - start_time)
+            reported_cost = best_cost
+            if bound <= 1.0:
+                break
+
+        if interrupted or weight <= 1.0:
+            break
+        if end_time is not None and time.perf_counter() > end_time:
+            break
+
+        # Nuova iterazione con peso ridotto: gli stati inconsistenti tornano nella frontiera,
+        # le priorità vengono ricalcolate e l'insieme chiuso viene svuotato
+        weight = max(1.0, weight - weight_step)
+        open_states = dict.fromkeys(state for _, cost, _, state in sorted(frontier)
+                                    if cost == g[state] and state not in closed)
+        open_states.update(inconsistent)
+        frontier[:] = [(g[state] + weight * h(state), g[state], counter(), state) for state in open_states]
+        heapq.heapify(frontier)
+        closed.clear()
+        inconsistent.clear()
+
+    if interrupted is not None:
+        if best_state is None:
+            return BudgetExhausted(interrupted, lower_bound())
+        if stats.suboptimality_bound > 1.0:
+            stats.budget_exhausted = interrupted
+    if best_state is None:
+        return None
+    path = _reconstruct_path(parents, best_state)
+    return path, best_cost, [(best_state, best_cost, path)]
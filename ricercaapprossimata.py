@@ -0,0 +1,344 @@
+import time
+
+from azioni import ACTION_NAMES, BLOCKED, OFFSETS
+from statistiche import SearchStats, finish_search
+
+MOVES = {offset: ACTION_NAMES[code] for code, offset in enumerate(OFFSETS)}
+
+
+def manhattan_distance(a, b):
+    # Distanza tra due celle senza celle bloccate (anche per i blocchi di ricercagerarchica)
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def paint_targets(problem):
+    # Celle da colorare: tutte quelle diverse dal colore obiettivo, escluse la posizione iniziale e le celle bloccate
+    grid, _ = problem.initial
+    return [(x, y) for x, row in enumerate(grid) for y, cell in enumerate(row)
+            if cell != problem.goal_color and cell != BLOCKED and (x, y) != problem.start_position]
+
+
+def tour_lower_bound(start, targets, distance=manhattan_distance):
+    """
+    Limite inferiore sul numero di mosse di un giro chiuso da `start` che visita tutti i `targets`.
+    Un cammino chiuso di lunghezza L visita al più L - 1 celle distinte oltre alla partenza
+    e, essendo la griglia bipartita, L è pari; inoltre deve raggiungere la cella più lontana e tornare.
+
+    :param start: Posizione iniziale (x, y).
+    :param targets: Celle da visitare.
+    :param distance: Distanza tra due celle (Manhattan oppure DistanceTable.distance con celle bloccate).
+    :return: Numero minimo di mosse.
+    """
+    if not targets:
+        return 0
+    by_count = len(targets) + 1
+    by_count += by_count % 2
+    return max(by_count, 2 * max(distance(start, target) for target in targets))
+
+
+def serpentine_order(targets, transpose):
+    # Celle ordinate a serpentina: per righe, oppure per colonne se transpose è True
+    lines = {}
+    for x, y in targets:
+        major, minor = (y, x) if transpose else (x, y)
+        lines.setdefault(major, []).append(minor)
+    tour = []
+    for i, major in enumerate(sorted(lines)):
+        for minor in sorted(lines[major], reverse=i % 2 == 1):
+            tour.append((minor, major) if transpose else (major, minor))
+    return tour
+
+
+def sweep_tour(start, targets, distance=manhattan_distance):
+    # Percorso a serpentina (boustrophedon) per righe o per colonne, il più corto dei due
+    return min(serpentine_order(targets, False), serpentine_order(targets, True),
+               key=lambda tour: tour_length(start, tour, distance))
+
+
+def _ring(center, radius):
+    # Celle a distanza di Manhattan esattamente `radius` da `center`
+    cx, cy = center
+    if radius == 0:
+        yield center
+        return
+    for dx in range(-radius, radius + 1):
+        dy = radius - abs(dx)
+        yield cx + dx, cy + dy
+        if dy:
+            yield cx + dx, cy - dy
+
+
+def nearest_neighbour_tour(start, targets, max_radius):
+    # Vicino più prossimo con ricerca ad anelli crescenti sulla griglia
+    remaining = set(targets)
+    tour = []
+    current = start
+    while remaining:
+        for radius in range(1, max_radius + 1):
+            found = next((cell for cell in _ring(current, radius) if cell in remaining), None)
+            if found is not None:
+                break
+        remaining.discard(found)
+        tour.append(found)
+        current = found
+    return tour
+
+
+class LocalSearch:
+    # 2-opt e Or-opt con liste di vicini, su un giro chiuso che comprende la partenza.
+    # Con un SearchBudget il miglioramento si ferma anche ai suoi limiti (le mosse applicate contano
+    # come espansioni); il motivo resta in `interrupted` e il giro corrente è comunque valido
+    def __init__(self, start, tour, max_radius, neighbours=8, distance=None, budget=None):
+        self.cities = [start] + tour
+        self.distance = distance
+        self.index = {city: i for i, city in enumerate(self.cities)}
+        self.tour = list(range(len(self.cities)))
+        self.position = list(range(len(self.cities)))
+        self.max_radius = max_radius
+        self.neighbour_count = neighbours
+        self._neighbours = {}
+        self.budget = budget
+        self.interrupted = None
+        self.moves = 0  # mosse di miglioramento applicate
+
+    def _stopped(self, end_time):
+        if self.budget is not None:
+            reason = self.budget.exhausted(self.moves, 0)
+            if reason is not None:
+                self.interrupted = reason
+                return True
+        return time.perf_counter() >= end_time
+
+    def d(self, i, j):
+        a, b = self.cities[i], self.cities[j]
+        if self.distance is not None:
+            return self.distance(a, b)
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def neighbours(self, i):
+        # Calcolate alla prima richiesta: con un limite di tempo breve non si paga per tutte le città
+        result = self._neighbours.get(i)
+        if result is None:
+            result = []
+            for radius in range(1, self.max_radius + 1):
+                for cell in _ring(self.cities[i], radius):
+                    j = self.index.get(cell)
+                    if j is not None:
+                        result.append(j)
+                if len(result) >= self.neighbour_count:
+                    break
+            self._neighbours[i] = result
+        return result
+
+    def _reverse(self, i, j):
+        # Inverte il tratto tour[i..j] (i <= j); sul giro ciclico è equivalente invertire il complemento,
+        # quindi si inverte sempre la parte più corta
+        n = len(self.tour)
+        if 2 * (j - i + 1) > n:
+            i, j = j + 1, i - 1 + n
+        tour, position = self.tour, self.position
+        while i < j:
+            a, b = i % n, j % n
+            tour[a], tour[b] = tour[b], tour[a]
+            position[tour[a]], position[tour[b]] = a, b
+            i += 1
+            j -= 1
+
+    def two_opt(self, end_time):
+        n = len(self.tour)
+        improved = True
+        while improved and not self._stopped(end_time):
+            improved = False
+            for i in range(n):
+                a, b = self.tour[i], self.tour[(i + 1) % n]
+                for c in self.neighbours(a):
+                    j = self.position[c]
+                    d = self.tour[(j + 1) % n]
+                    if c == b or d == a:
+                        continue
+                    delta = self.d(a, c) + self.d(b, d) - self.d(a, b) - self.d(c, d)
+                    if delta < 0:
+                        low, high = sorted((i, j))
+                        self._reverse(low + 1, high)
+                        self.moves += 1
+                        improved = True
+                        break
+                if self._stopped(end_time):
+                    return
+
+    def or_opt(self, end_time):
+        improved = True
+        while improved and not self._stopped(end_time):
+            improved = False
+            for length in (1, 2, 3):
+                n = len(self.tour)
+                if n < length + 3:
+                    break
+                i = 1
+                while i + length < n:
+                    segment = self.tour[i:i + length]
+                    prev, nxt = self.tour[i - 1], self.tour[i + length]
+                    gain = self.d(prev, segment[0]) + self.d(segment[-1], nxt) - self.d(prev, nxt)
+                    best = None
+                    for c in self.neighbours(segment[0]) + self.neighbours(segment[-1]):
+                        if c in segment or c == prev:
+                            continue
+                        e = self.tour[(self.position[c] + 1) % n]
+                        if e in segment:
+                            continue
+                        forward = self.d(c, segment[0]) + self.d(segment[-1], e)
+                        backward = self.d(c, segment[-1]) + self.d(segment[0], e)
+                        added = min(forward, backward) - self.d(c, e)
+                        if gain - added > 0 and (best is None or gain - added > best[0]):
+                            best = (gain - added, c, forward > backward)
+                    if best is not None:
+                        _, c, flip = best
+                        del self.tour[i:i + length]
+                        if flip:
+                            segment.reverse()
+                        insert_at = self.position[c] + 1
+                        if insert_at > i:
+                            insert_at -= length
+                        self.tour[insert_at:insert_at] = segment
+                        # Solo le posizioni tra il punto di rimozione e quello di inserimento cambiano
+                        for k in range(min(i, insert_at), max(i, insert_at) + length):
+                            self.position[self.tour[k]] = k
+                        self.moves += 1
+                        improved = True
+                    else:
+                        i += 1
+                    if self._stopped(end_time):
+                        return
+
+    def result(self):
+        # Ruota il giro in modo che inizi dalla partenza (indice 0) e la esclude
+        k = self.position[0]
+        ordered = self.tour[k:] + self.tour[:k]
+        return [self.cities[i] for i in ordered[1:]]
+
+
+def tour_length(start, tour, distance=manhattan_distance):
+    if not tour:
+        return 0
+    stops = [start] + tour + [start]
+    return sum(distance(a, b) for a, b in zip(stops, stops[1:]))
+
+
+def tour_to_actions(start, tour, table=None):
+    """
+    Converte un giro in azioni primitive: per ogni tappa si spostano prima le righe e poi le colonne,
+    si colora la cella raggiunta e alla fine si torna alla posizione iniziale.
+    Con una DistanceTable (celle bloccate) gli spostamenti seguono invece i percorsi minimi della tabella.
+    """
+    actions = []
+    x, y = start
+    for target in tour + [start]:
+        if table is not None:
+            actions.extend(table.walk((x, y), target))
+            x, y = target
+            if target != start:
+                actions.append('Paint')
+            continue
+        tx, ty = target
+        step = 1 if tx > x else -1
+        actions.extend([MOVES[(step, 0)]] * abs(tx - x))
+        step = 1 if ty > y else -1
+        actions.extend([MOVES[(0, step)]] * abs(ty - y))
+        x, y = tx, ty
+        if target != start:
+            actions.append('Paint')
+    return actions
+
+
+def approximate_tour_search(problem, construction='best', time_limit=0.05, return_stats=False, track_memory=False,
+                            budget=None):
+    """
+    Solutore approssimato per griglie grandi: le celle da colorare sono tappe di un giro che parte
+    e termina in start_position; il giro è costruito (serpentina o vicino più prossimo) e poi migliorato
+    con 2-opt e Or-opt sulle distanze di Manhattan.
+
+    :param problem: Un'istanza del problema UniformColoring.
+    :param construction: 'sweep' (serpentina), 'nearest' (vicino più prossimo) oppure 'best' (il migliore dei due).
+    :param time_limit: Secondi dedicati al miglioramento locale (0 = solo costruzione).
+    :param return_stats: Se True, restituisce anche le statistiche con lower_bound e suboptimality_bound.
+    :param track_memory: Se True, le statistiche includono il picco di memoria (tracemalloc, rallenta la ricerca).
+    :param budget: SearchBudget opzionale: se si esaurisce, il miglioramento locale si interrompe e viene
+                   restituito il giro migliore trovato, con il motivo in budget_exhausted delle statistiche.
+    :return: (percorso, costo, passaggi) nel formato delle altre ricerche, None se una cella da colorare
+             è irraggiungibile a causa delle celle bloccate.
+    """
+    stats = SearchStats("Giro approssimato", track_memory=track_memory).start()
+    if budget is not None:
+        budget.start(problem)
+    grid, _ = problem.initial
+    start = problem.start_position
+    targets = paint_targets(problem)
+    max_radius = len(grid) + len(grid[0])
+
+    table, distance = tour_distances(problem, targets)
+    if distance is None:
+        return finish_search(stats, None, return_stats)
+
+    candidates = []
+    if construction in ('sweep', 'best'):
+        candidates.append(sweep_tour(start, targets, distance))
+    if construction in ('nearest', 'best'):
+        candidates.append(nearest_neighbour_tour(start, targets, max_radius))
+    tour = min(candidates, key=lambda candidate: tour_length(start, candidate, distance))
+
+    if time_limit and len(tour) > 2:
+        tour, stats.budget_exhausted = improve_tour(start, tour, max_radius, table, distance, time_limit, budget)
+
+    return tour_solution(problem, targets, tour, table, distance, stats, return_stats)
+
+
+def tour_distances(problem, targets):
+    """
+    Con celle bloccate le distanze di Manhattan non sono più esatte: si usa la tabella delle distanze.
+
+    :return: (DistanceTable o None, funzione distanza); la funzione è None se una cella da colorare
+             non è raggiungibile dalla posizione iniziale.
+    """
+    if not problem.blocked:
+        return None, manhattan_distance
+    table = problem.distances
+    if not all(table.reachable(problem.start_position, target) for target in targets):
+        return table, None
+    return table, table.distance
+
+
+def improve_tour(start, tour, max_radius, table, distance, time_limit, budget=None):
+    """
+    2-opt e Or-opt entro il limite di tempo (e i limiti del budget); il giro migliorato è tenuto solo se più corto.
+
+    :return: (giro, motivo dell'interruzione da parte del budget oppure None).
+    """
+    end_time = time.perf_counter() + time_limit
+    search = LocalSearch(start, tour, max_radius, distance=table.distance if table is not None else None, budget=budget)
+    search.two_opt(end_time)
+    if search.interrupted is None:
+        search.or_opt(end_time)
+    improved = search.result()
+    if tour_length(start, improved, distance) < tour_length(start, tour, distance):
+        tour = improved
+    return tour, search.interrupted
+
+
+def tour_solution(problem, targets, tour, table, distance, stats, return_stats):
+    # Converte un giro nel risultato delle ricerche, con il limite inferiore globale sul costo ottimo
+    grid, _ = problem.initial
+    start = problem.start_position
+    paint_cost = problem.color_costs[problem.goal_color] * len(targets)
+    moves = tour_length(start, tour, distance)
+    cost = paint_cost + moves
+    lower_bound = paint_cost + tour_lower_bound(start, targets, distance)
+    path = tour_to_actions(start, tour, table)
+
+    # Stato finale: tutte le celle del colore obiettivo, tranne la 'T' e le celle bloccate
+    final_grid = tuple("".join(cell if cell in ('T', BLOCKED) else problem.goal_color for cell in row)
+                       for row in grid)
+    final_state = (final_grid, start)
+
+    stats.lower_bound = lower_bound
+    stats.suboptimality_bound = cost / lower_bound if lower_bound else 1.0
+    return finish_search(stats, (path, cost, [(final_state, cost, path)]), return_stats)
@@ -0,0 +1,296 @@
+import heapq
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from azioni import DOWN, LEFT, PAINT, RIGHT, UP, action_names, move_table
+from limiti import BudgetExhausted
+from statistiche import SearchStats, finish_search
+
+# Azione opposta a ogni movimento (per risalire dal figlio al padre)
+_OPPOSITE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+
+class _StateCodec:
+    # Stati come record di lunghezza fissa: indice della posizione (big-endian) seguito dalle celle.
+    # L'ultimo byte è sempre una lettera, quindi il tipo 'S' di NumPy non tronca i record
+    # e l'ordinamento di NumPy coincide con quello dei bytes Python.
+    def __init__(self, rows, cols):
+        self.cols = cols
+        self.index_bytes = 2 if rows * cols <= 0xFFFF else 4
+        self.dtype = np.dtype(f'S{self.index_bytes + rows * cols}')
+
+    def encode(self, state):
+        grid, (x, y) = state
+        return (x * self.cols + y).to_bytes(self.index_bytes, 'big') + "".join(grid).encode('ascii')
+
+    def decode(self, record):
+        cells = record[self.index_bytes:].decode('ascii')
+        grid = tuple(cells[i:i + self.cols] for i in range(0, len(cells), self.cols))
+        return grid, divmod(int.from_bytes(record[:self.index_bytes], 'big'), self.cols)
+
+
+class _OpenLayer:
+    # Candidati di costo g: buffer in memoria, riversato su disco come run ordinata e senza duplicati
+    def __init__(self, search, g):
+        self.search = search
+        self.g = g
+        self.buffer = []
+        self.runs = []
+
+    def add(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.search.buffer_records:
+            self._spill()
+
+    def _sorted_buffer(self):
+        array = np.unique(np.array(self.buffer, dtype=self.search.codec.dtype))
+        self.search.stats.duplicate_pops += len(self.buffer) - len(array)
+        self.buffer = []
+        return array
+
+    def _spill(self):
+        self.runs.append(self.search.write_run(f"aperti-{self.g}-{len(self.runs)}", self._sorted_buffer()))
+
+    def chunks(self):
+        # Record ordinati e senza duplicati, a blocchi di chunk_records
+        size = self.search.chunk_records
+        if not self.runs:
+            # Strato caldo: non è mai uscito dalla memoria
+            array = self._sorted_buffer()
+            for start in range(0, len(array), size):
+                yield array[start:start + size]
+            return
+
+        if self.buffer:
+            self._spill()
+        chunk, previous = [], None
+        for record in heapq.merge(*(self.search.read_run(run) for run in self.runs)):
+            if record == previous:
+                self.search.stats.duplicate_pops += 1
+                continue
+            chunk.append(record)
+            previous = record
+            if len(chunk) >= size:
+                yield np.array(chunk, dtype=self.search.codec.dtype)
+                chunk = []
+        if chunk:
+            yield np.array(chunk, dtype=self.search.codec.dtype)
+        for path, _ in self.runs:
+            os.remove(path)
+
+
+class _ExternalSearch:
+    def __init__(self, problem, directory, buffer_records, hot_records, chunk_records, stats):
+        grid, _ = problem.initial
+        self.problem = problem
+        self.codec = _StateCodec(len(grid), len(grid[0]))
+        self.directory = directory
+        self.buffer_records = buffer_records
+        self.hot_records = hot_records
+        self.chunk_records = chunk_records
+        self.stats = stats
+        self.closed = {}  # g -> (percorso del file, numero di record)
+        self.hot = {}     # g -> array in memoria degli strati chiusi più recenti
+        self._closed_file = None
+        stats.bytes_written = stats.bytes_read = 0
+
+    def write_run(self, name, array):
+        path = os.path.join(self.directory, f"{name}.run")
+        array.tofile(path)
+        self.stats.bytes_written += array.nbytes
+        return path, len(array)
+
+    def read_run(self, run):
+        path, count = run
+        if not count:
+            return
+        data = np.memmap(path, dtype=self.codec.dtype, mode='r', shape=(count,))
+        for start in range(0, count, self.chunk_records):
+            block = data[start:start + self.chunk_records]
+            self.stats.bytes_read += block.nbytes
+            yield from block.tolist()
+
+    def closed_layer(self, g):
+        # Strato chiuso di costo g: in memoria se caldo, altrimenti in memory-map dal disco
+        layer = self.hot.get(g)
+        if layer is None and g in self.closed:
+            path, count = self.closed[g]
+            layer = np.memmap(path, dtype=self.codec.dtype, mode='r', shape=(count,)) if count else np.array([], dtype=self.codec.dtype)
+        return layer
+
+    def in_closed(self, g, records):
+        # Appartenenza di un blocco ordinato di record allo strato chiuso g (ricerca binaria vettoriale)
+        layer = self.closed_layer(g)
+        if layer is None or not len(layer):
+            return np.zeros(len(records), dtype=bool)
+        if g not in self.hot:
+            # I record sono ordinati: la ricerca legge al più una volta ogni pagina dello strato
+            self.stats.bytes_read += min(layer.nbytes, len(records) * layer.itemsize * 2)
+        index = np.minimum(np.searchsorted(layer, records), len(layer) - 1)
+        return layer[index] == records
+
+    def contains(self, g, state):
+        return bool(self.in_closed(g, np.array([self.codec.encode(state)], dtype=self.codec.dtype))[0])
+
+    def begin_closed(self, g):
+        # Lo strato chiuso viene scritto a blocchi mentre si espande; resta anche in memoria finché è piccolo
+        self._closed_path = os.path.join(self.directory, f"chiusi-{g}.run")
+        self._closed_file = open(self._closed_path, 'wb')
+        self._closed_count = 0
+        self._closed_hot = []
+
+    def append_closed(self, array):
+        array.tofile(self._closed_file)
+        self._closed_count += len(array)
+        self.stats.bytes_written += array.nbytes
+        if self._closed_hot is not None:
+            self._closed_hot.append(array)
+            if self._closed_count > self.hot_records:
+                self._closed_hot = None
+
+    def finish_closed(self, g):
+        self._closed_file.close()
+        self._closed_file = None
+        self.closed[g] = (self._closed_path, self._closed_count)
+        if self._closed_hot is not None:
+            self.hot[g] = np.concatenate(self._closed_hot) if self._closed_hot else np.array([], dtype=self.codec.dtype)
+
+    def close(self):
+        if self._closed_file is not None:
+            self._closed_file.close()
+
+    def reconstruct(self, state, g):
+        """
+        Ricostruzione all'indietro del percorso: il predecessore di ogni stato è cercato negli strati chiusi.
+        Per i movimenti è la posizione vicina nello strato g - 1; per la pittura è la stessa posizione
+        con la cella del colore iniziale, nello strato g - costo di pittura.
+        """
+        problem = self.problem
+        initial_grid, _ = problem.initial
+        paint_cost = problem.color_costs[problem.goal_color]
+        moves = move_table(len(initial_grid), len(initial_grid[0]), problem.blocked)
+        cols = len(initial_grid[0])
+        path = []
+        while g > 0:
+            grid, position = state
+            x, y = position
+            original = initial_grid[x][y]
+            found = None
+            if position != problem.start_position and grid[x][y] == problem.goal_color != original:
+                row = grid[x]
+                parent = (grid[:x] + (row[:y] + original + row[y + 1:],) + grid[x + 1:], position)
+                if self.contains(g - paint_cost, parent):
+                    found = parent, g - paint_cost, PAINT
+            if found is None:
+                for code, neighbour in moves[x * cols + y]:
+                    if self.contains(g - 1, (grid, neighbour)):
+                        found = (grid, neighbour), g - 1, _OPPOSITE[code]
+                        break
+            state, g, code = found
+            path.append(code)
+        path.reverse()
+        return action_names(path)
+
+
+def external_memory_search(problem, heuristic=None, upper_bound=None, directory=None, buffer_records=1_000_000,
+                           hot_records=1_000_000, chunk_records=65536, return_stats=False, budget=None,
+                           track_memory=False):
+    """
+    Ricerca ottima in memoria esterna (frontier search a strati di costo con rilevamento ritardato dei duplicati).
+    Gli stati di costo g sono raccolti in run ordinate su disco, unite e deduplicate solo quando lo strato g
+    viene espanso, e confrontate con gli strati chiusi g - 1 e g - 2: i movimenti sono reversibili a costo 1
+    e la pittura non si annulla, quindi un duplicato non può comparire più tardi di due strati.
+    Gli strati chiusi restano su disco per ricostruire il percorso; in memoria restano solo i buffer
+    e gli strati chiusi più recenti (se non superano hot_records).
+
+    :param problem: Un'istanza del problema UniformColoring.
+    :param heuristic: Euristica ammissibile opzionale (stato, colore, costi): gli stati con g + h > upper_bound
+                      non vengono generati (breadth-first heuristic search).
+    :param upper_bound: Costo di una soluzione nota; se None e c'è un'euristica, si usa il solutore approssimato.
+    :param directory: Cartella per i file temporanei (None = cartella temporanea di sistema).
+    :param buffer_records: Record per strato tenuti in memoria prima di scrivere una run su disco.
+    :param hot_records: Dimensione massima di uno strato chiuso tenuto in memoria.
+    :param chunk_records: Record elaborati per blocco durante l'unione delle run.
+    :param return_stats: Se True, restituisce anche le statistiche (con i byte letti e scritti).
+    :param budget: SearchBudget opzionale.
+    :param track_memory: Se True, le statistiche includono il picco di memoria (tracemalloc, rallenta la ricerca).
+    :return: (percorso, costo, passaggi), None se non c'è soluzione, oppure BudgetExhausted.
+    """
+    stats = SearchStats("Memoria esterna", track_memory=track_memory).start()
+    if budget is not None:
+        budget.start(problem)
+    if heuristic is not None and upper_bound is None:
+        from ricercaapprossimata import approximate_tour_search
+        approximate = approximate_tour_search(problem, time_limit=0)
+        upper_bound = approximate[1] if approximate else None
+
+    work_directory = tempfile.mkdtemp(prefix='ricerca_esterna_', dir=directory)
+    try:
+        search = _ExternalSearch(problem, work_directory, buffer_records, hot_records, chunk_records, stats)
+        try:
+            result = _external_search(problem, search, heuristic, upper_bound, stats, budget)
+        finally:
+            search.close()
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+    return finish_search(stats, result, return_stats)
+
+
+def _external_search(problem, search, heuristic, upper_bound, stats, budget):
+    codec = search.codec
+    layers = {0: _OpenLayer(search, 0)}
+    layers[0].add(codec.encode(problem.initial))
+    stats.nodes_generated += 1
+
+    while layers:
+        g = min(layers)
+        layer = layers.pop(g)
+        # Solo gli strati chiusi g - 1 e g - 2 servono per i duplicati: gli altri escono dalla memoria
+        for old in [old for old in search.hot if old < g - 2]:
+            del search.hot[old]
+        search.begin_closed(g)
+
+        for chunk in layer.chunks():
+            fresh = ~(search.in_closed(g - 1, chunk) | search.in_closed(g - 2, chunk))
+            stats.duplicate_pops += len(chunk) - int(fresh.sum())
+            chunk = chunk[fresh]
+            search.append_closed(chunk)
+
+            for record in chunk.tolist():
+                state = codec.decode(record)
+                if problem.goal_test(state):
+                    search.finish_closed(g)
+                    path = search.reconstruct(state, g)
+                    return path, g, [(state, g, path)]
+
+                if budget is not None:
+                    in_memory = sum(len(open_layer.buffer) for open_layer in layers.values())
+                    reason = budget.exhausted(stats.nodes_expanded, in_memory)
+                    if reason is not None:
+                        return BudgetExhausted(reason, g)
+
+                stats.nodes_expanded += 1
+                for _, child, step_cost in problem.successors(state):
+                    new_g = g + step_cost
+                    stats.nodes_generated += 1
+                    if heuristic is not None and upper_bound is not None and \
+                            new_g + heuristic(child, problem.goal_color, problem.color_costs) > upper_bound:
+                        continue
+                    target = layers.get(new_g)
+                    if target is None:
+                        target = layers[new_g] = _OpenLayer(search, new_g)
+                    target.add(codec.encode(child))
+
+            in_memory = sum(len(open_layer.buffer) for open_layer in layers.values())
+            if in_memory > stats.peak_frontier:
+                stats.peak_frontier = in_memory
+
+        search.finish_closed(g)
+        hot = sum(len(array) for array in search.hot.values())
+        if hot > stats.peak_closed:
+            stats.peak_closed = hot
+
+    return None
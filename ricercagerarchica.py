@@ -0,0 +1,231 @@
+import os
+import time
+
+from ricercaapprossimata import (LocalSearch, improve_tour, manhattan_distance, nearest_neighbour_tour, paint_targets,
+                                 serpentine_order, tour_distances, tour_solution)
+from statistiche import SearchStats, finish_search
+
+
+def partition_blocks(targets, block_size):
+    # Raggruppa le celle da colorare per blocco: il blocco (bx, by) copre le righe bx * block_size ...
+    blocks = {}
+    for x, y in targets:
+        blocks.setdefault((x // block_size, y // block_size), []).append((x, y))
+    return blocks
+
+
+def block_portals(block, cells, block_size):
+    """
+    Punti di ingresso e di uscita candidati di un blocco: le celle da colorare più vicine
+    ai quattro angoli del blocco (al più quattro celle distinte).
+    """
+    x0, y0 = block[0] * block_size, block[1] * block_size
+    x1, y1 = x0 + block_size - 1, y0 + block_size - 1
+    portals = []
+    for corner in ((x0, y0), (x0, y1), (x1, y0), (x1, y1)):
+        portal = min(cells, key=lambda cell: manhattan_distance(cell, corner))
+        if portal not in portals:
+            portals.append(portal)
+    return portals
+
+
+def _block_distance(shape):
+    # Nei processi figli la tabella delle distanze è riaperta dalla cache su disco (memory-map)
+    rows, cols, blocked = shape
+    if not blocked:
+        return manhattan_distance
+    from distanze import distance_table
+    return distance_table(rows, cols, blocked).distance
+
+
+def _two_opt_open(stops, distance, end_time, budget=None):
+    # 2-opt su un cammino aperto: il primo e l'ultimo punto restano fissi
+    n = len(stops)
+    improved = True
+    while improved and time.perf_counter() < end_time and (budget is None or budget.exhausted(0, 0) is None):
+        improved = False
+        for i in range(n - 3):
+            for j in range(i + 2, n - 1):
+                a, b, c, d = stops[i], stops[i + 1], stops[j], stops[j + 1]
+                if distance(a, c) + distance(b, d) < distance(a, b) + distance(c, d):
+                    stops[i + 1:j + 1] = stops[i + 1:j + 1][::-1]
+                    improved = True
+    return stops
+
+
+def _path_length(stops, distance):
+    return sum(distance(a, b) for a, b in zip(stops, stops[1:]))
+
+
+def solve_block(cells, portals, shape, time_limit, budget=None):
+    """
+    Cammini di copertura di un blocco per ogni coppia (ingresso, uscita) di portali:
+    costruzione (vicino più prossimo o serpentina) e 2-opt con estremi fissi.
+
+    :param cells: Celle da colorare del blocco.
+    :param portals: Portali candidati (celle del blocco).
+    :param shape: (righe, colonne, celle bloccate) della griglia completa.
+    :param time_limit: Secondi dedicati al miglioramento locale dell'intero blocco.
+    :param budget: SearchBudget opzionale: quando si esaurisce restano le sole costruzioni, senza 2-opt.
+    :return: Dizionario (ingresso, uscita) -> (mosse, tappe dall'ingresso all'uscita incluse).
+    """
+    distance = _block_distance(shape)
+    max_radius = shape[0] + shape[1]
+    pairs = [(entry, exit) for entry in portals for exit in portals if entry != exit or len(cells) == 1]
+    end_time = time.perf_counter() + time_limit
+    # Le costruzioni sono calcolate una volta per blocco (serpentine) o per ingresso (vicino più prossimo);
+    # per ogni coppia si tolgono solo i due portali
+    sweeps = [serpentine_order(cells, transpose) for transpose in (False, True)]
+    sweeps += [sweep[::-1] for sweep in sweeps]
+    nearest = {entry: nearest_neighbour_tour(entry, [cell for cell in cells if cell != entry], max_radius)
+               for entry in portals}
+    walks = {}
+    for k, (entry, exit) in enumerate(pairs):
+        ends = [exit] if exit != entry else []
+        candidates = ([cell for cell in candidate if cell != entry and cell != exit]
+                      for candidate in [nearest[entry]] + sweeps)
+        stops = min(([entry] + candidate + ends for candidate in candidates), key=lambda s: _path_length(s, distance))
+        # Il tempo residuo è diviso tra le coppie ancora da elaborare
+        pair_end = time.perf_counter() + max(0.0, end_time - time.perf_counter()) / (len(pairs) - k)
+        stops = _two_opt_open(stops, distance, pair_end, budget)
+        walks[(stops[0], stops[-1])] = (_path_length(stops, distance), stops)
+    return walks
+
+
+def _solve_block_task(task):
+    return solve_block(*task)
+
+
+def _solve_blocks(tasks, budget):
+    # Blocchi nel processo corrente; dopo l'esaurimento del budget solo costruzioni (time_limit = 0)
+    results, reason = [], None
+    for cells, portals, shape, time_limit in tasks:
+        if reason is None and budget is not None:
+            reason = budget.exhausted(len(results), 0)
+        if reason is None:
+            results.append(solve_block(cells, portals, shape, time_limit, budget))
+        else:
+            results.append(solve_block(cells, portals, shape, 0.0))
+    return results, reason
+
+
+def _solve_blocks_parallel(tasks, workers, budget):
+    # Il budget (con il suo CancellationToken) resta nel processo padre, che lo controlla mentre attende i blocchi:
+    # quando si esaurisce, i blocchi non ancora avviati sono annullati e costruiti qui senza 2-opt
+    # (quelli in corso terminano entro il proprio time_limit). Importato solo qui: uniformcoloring resta leggero
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    reason = None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_solve_block_task, task) for task in tasks]
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            if budget is not None and reason is None:
+                reason = budget.exhausted(len(futures) - len(pending), 0)
+                if reason is not None:
+                    for future in pending:
+                        future.cancel()
+                    break
+        results = [None if future.cancelled() else future.result() for future in futures]
+    results = [result if result is not None else solve_block(*task[:3], 0.0) for result, task in zip(results, tasks)]
+    return results, reason
+
+
+def _stitch(start, order, walks, distance):
+    """
+    Programmazione dinamica sui portali, dato l'ordine dei blocchi: per ogni blocco si sceglie
+    la coppia (ingresso, uscita) che minimizza il costo totale del giro da `start` a `start`.
+
+    :return: (mosse del giro, tappe nell'ordine di visita).
+    """
+    layer = {start: (0, None, None)}  # uscita -> (costo, uscita del blocco precedente, ingresso)
+    layers = []
+    for block in order:
+        next_layer = {}
+        for (entry, exit), (length, _) in walks[block].items():
+            cost, previous = min((cost + distance(point, entry), point) for point, (cost, _, _) in layer.items())
+            cost += length
+            if exit not in next_layer or cost < next_layer[exit][0]:
+                next_layer[exit] = (cost, previous, entry)
+        layers.append(next_layer)
+        layer = next_layer
+    total, exit = min((cost + distance(point, start), point) for point, (cost, _, _) in layer.items())
+
+    segments = []
+    for block, layer in zip(reversed(order), reversed(layers)):
+        _, previous, entry = layer[exit]
+        segments.append(walks[block][(entry, exit)][1])
+        exit = previous
+    return total, [cell for stops in reversed(segments) for cell in stops]
+
+
+def _block_orders(start_block, blocks, max_radius):
+    # Ordini candidati dei blocchi, sulla griglia dei blocchi: serpentine e vicino più prossimo con 2-opt
+    others = [block for block in blocks if block != start_block]
+    orders = [serpentine_order(others, False), serpentine_order(others, True)]
+    nearest = nearest_neighbour_tour(start_block, others, max_radius)
+    orders.append(nearest)
+    if len(nearest) > 2:
+        search = LocalSearch(start_block, nearest, max_radius)
+        search.two_opt(time.perf_counter() + 0.01)
+        orders.append(search.result())
+    # Il blocco della posizione iniziale, se contiene celle da colorare, è visitato per primo o per ultimo
+    if start_block in blocks:
+        orders = [[start_block] + order for order in orders] + [order + [start_block] for order in orders]
+    return orders
+
+
+def hierarchical_search(problem, block_size=8, workers=None, time_limit=0.02, polish_time=0.0, return_stats=False,
+                        track_memory=False, budget=None):
+    """
+    Solutore per griglie molto grandi: la griglia è divisa in blocchi block_size x block_size,
+    per ogni blocco si calcolano (in parallelo) i cammini di copertura tra i portali di ingresso e uscita,
+    poi un problema di ordinamento sui blocchi e sui portali li unisce in un giro da e verso start_position.
+
+    :param problem: Un'istanza del problema UniformColoring.
+    :param block_size: Lato dei blocchi in celle.
+    :param workers: Processi per i blocchi (None = numero di CPU, 1 = nel processo corrente).
+    :param time_limit: Secondi di miglioramento locale per ogni blocco.
+    :param polish_time: Secondi di 2-opt/Or-opt sul giro completo dopo l'unione (0 = giro unito così com'è).
+    :param return_stats: Se True, restituisce anche le statistiche con lower_bound e suboptimality_bound.
+    :param track_memory: Se True, le statistiche includono il picco di memoria (tracemalloc, rallenta la ricerca).
+    :param budget: SearchBudget opzionale (i blocchi risolti contano come espansioni): quando si esaurisce,
+                   i blocchi rimanenti sono solo costruiti, senza 2-opt, e viene restituito il giro unito,
+                   con il motivo in budget_exhausted delle statistiche.
+    :return: (percorso, costo, passaggi) nel formato delle altre ricerche, None se una cella da colorare
+             è irraggiungibile a causa delle celle bloccate.
+    """
+    stats = SearchStats("Gerarchico a blocchi", track_memory=track_memory).start()
+    if budget is not None:
+        budget.start(problem)
+    grid, _ = problem.initial
+    start = problem.start_position
+    targets = paint_targets(problem)
+    max_radius = len(grid) + len(grid[0])
+
+    # La tabella delle distanze (se serve) è calcolata qui, così i processi figli la trovano su disco
+    table, distance = tour_distances(problem, targets)
+    if distance is None:
+        return finish_search(stats, None, return_stats)
+
+    blocks = partition_blocks(targets, block_size)
+    shape = (len(grid), len(grid[0]), problem.blocked)
+    keys = list(blocks)
+    tasks = [(blocks[key], block_portals(key, blocks[key], block_size), shape, time_limit) for key in keys]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        results, stats.budget_exhausted = _solve_blocks(tasks, budget)
+    else:
+        results, stats.budget_exhausted = _solve_blocks_parallel(tasks, min(workers, len(tasks)), budget)
+    walks = dict(zip(keys, results))
+
+    tour = []
+    if keys:
+        start_block = (start[0] // block_size, start[1] // block_size)
+        block_radius = max_radius // block_size + 2
+        _, tour = min((_stitch(start, order, walks, distance) for order in _block_orders(start_block, keys, block_radius)),
+                      key=lambda stitched: stitched[0])
+
+    if polish_time and len(tour) > 2 and stats.budget_exhausted is None:
+        tour, stats.budget_exhausted = improve_tour(start, tour, max_radius, table, distance, polish_time, budget)
+    return tour_solution(problem, targets, tour, table, distance, stats, return_stats)
@@ -0,0 +1,234 @@
+from azioni import BLOCKED, PAINT, action_names, blocked_cells, move_table
+from frontiera import make_frontier
+from limiti import BudgetExhausted
+from statistiche import SearchStats, finish_search
+from uniformcoloring import find_starting_position
+
+# Ricerca incrementale dopo la correzione di singole celle (es. un errore dell'OCR corretto a mano).
+#
+# Le mosse costano 1 e ogni pittura costa lo stesso (il costo del colore obiettivo), qualunque sia
+# la lettera della cella: uno stato si può quindi descrivere come (celle già colorate, posizione),
+# con le celle colorate in una maschera di bit. Il costo minimo per arrivare a uno stato non dipende
+# dalle altre celle della griglia, quindi i valori g restano validi dopo una correzione, come in LPA*:
+# - una lettera diversa dal colore obiettivo sostituita da un'altra: il grafo non cambia;
+# - una cella che diventa del colore obiettivo: si scartano gli stati in cui era già stata colorata;
+# - una cella del colore obiettivo che diventa da colorare: agli stati chiusi su quella cella
+#   si aggiunge l'azione di pittura, che diventa il nuovo bordo della ricerca.
+# Le correzioni che cambiano la topologia ('T', 'X') ricominciano la ricerca da capo.
+
+
+class IncrementalSolver:
+    """
+    Risolutore che conserva insieme chiuso e frontiera tra una correzione della griglia e l'altra:
+    dopo update_cell, solve ripara solo la parte del grafo toccata dalla modifica.
+
+    La ricerca è un A* sul numero di mosse (g meno il costo delle celle colorate, che è lo stesso
+    per tutti gli stati) con l'euristica consistente "andare alla cella mancante più lontana e tornare
+    alla posizione iniziale". I valori g dell'insieme chiuso restano esatti dopo una correzione,
+    mentre l'euristica cambia con l'insieme delle celle da colorare: update_cell ricalcola
+    le priorità della frontiera, senza rieseguire le espansioni.
+    """
+
+    def __init__(self, grid, goal_color, color_costs, frontier='bucket'):
+        """
+        :param grid: Griglia come sequenza di stringhe.
+        :param goal_color: Colore obiettivo (resta fisso: cambiarlo richiede un nuovo risolutore).
+        :param color_costs: Costi dei colori.
+        :param frontier: 'bucket' (coda di Dial, priorità intere) oppure 'heap'.
+        """
+        self.goal_color = goal_color
+        self.color_costs = color_costs
+        self._paint_cost = color_costs[goal_color]
+        self._frontier_kind = frontier
+        self.expansions = 0  # nodi espansi in totale, su tutte le chiamate a solve
+        self._reset(grid)
+
+    def _reset(self, grid):
+        # Ricerca da capo: griglia nuova o correzione che cambia la topologia
+        grid = [str(row) for row in grid]
+        self.start_position = find_starting_position(grid)
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.blocked = blocked_cells(grid)
+        self._grid = grid
+        self._cells = self.rows * self.cols
+        self._moves = [tuple((code, nx * self.cols + ny) for code, (nx, ny) in moves)
+                       for moves in move_table(self.rows, self.cols, self.blocked)]
+        self._start = self.start_position[0] * self.cols + self.start_position[1]
+        sx, sy = self.start_position
+        self._coords = [divmod(index, self.cols) for index in range(self._cells)]
+        self._home = [abs(x - sx) + abs(y - sy) for x, y in self._coords]  # distanza dalla posizione iniziale
+        self._pending = 0  # maschera delle celle da colorare
+        for index, cell in enumerate("".join(grid)):
+            if self._needs_paint(cell):
+                self._pending |= 1 << index
+        # Chiave di uno stato: maschera delle celle colorate * numero di celle + indice della posizione.
+        # Insieme chiuso: chiave -> (mosse, chiave del genitore, codice dell'azione)
+        self._closed = {}
+        self._frontier = make_frontier(self._frontier_kind)
+        # (mosse + euristica, mosse, chiave, genitore, azione)
+        self._frontier.push((self._heuristic(0, self._start), 0, self._start, None, None))
+
+    def _heuristic(self, painted, position):
+        # Mosse minime per raggiungere la cella da colorare più lontana e tornare alla posizione iniziale
+        # (distanze di Manhattan: le celle bloccate possono solo allungare il percorso)
+        px, py = self._coords[position]
+        coords, home = self._coords, self._home
+        best = home[position]
+        remaining = self._pending & ~painted
+        while remaining:
+            low = remaining & -remaining
+            index = low.bit_length() - 1
+            x, y = coords[index]
+            distance = abs(px - x) + abs(py - y) + home[index]
+            if distance > best:
+                best = distance
+            remaining ^= low
+        return best
+
+    def _reprioritize(self):
+        # L'euristica dipende dalle celle da colorare: la frontiera viene ricostruita con le nuove priorità,
+        # scartando le voci di stati che la correzione ha reso impossibili
+        old, closed, pending, cells = self._frontier, self._closed, self._pending, self._cells
+        frontier = make_frontier(self._frontier_kind)
+        while old:
+            _, moves, key, parent, code = old.pop()
+            painted, position = divmod(key, cells)
+            if key in closed or painted & ~pending or (parent is not None and parent not in closed):
+                continue
+            frontier.push((moves + self._heuristic(painted, position), moves, key, parent, code))
+        self._frontier = frontier
+
+    def _needs_paint(self, cell):
+        return cell != self.goal_color and cell != 'T' and cell != BLOCKED
+
+    @property
+    def grid(self):
+        return list(self._grid)
+
+    def update_cell(self, x, y, letter):
+        """
+        Corregge una cella della griglia mantenendo il grafo di ricerca quando è possibile.
+
+        :param letter: Nuova lettera della cella.
+        :return: True se la ricerca precedente viene riutilizzata, False se ricomincia da capo
+                 (la correzione coinvolge la 'T' o una cella bloccata).
+        """
+        if len(letter) != 1:
+            raise ValueError(f"Errore: {letter!r} non è una lettera valida per una cella.")
+        if not (0 <= x < self.rows and 0 <= y < self.cols):
+            raise ValueError(f"Errore: la cella ({x}, {y}) è fuori dalla griglia.")
+        row = self._grid[x]
+        old = row[y]
+        if old == letter:
+            return True
+        grid = self._grid[:x] + [row[:y] + letter + row[y + 1:]] + self._grid[x + 1:]
+        if {old, letter} & {'T', BLOCKED}:
+            self._reset(grid)
+            return False
+        self._grid = grid
+
+        index = x * self.cols + y
+        bit = 1 << index
+        was_pending, pending = self._needs_paint(old), self._needs_paint(letter)
+        if was_pending and not pending:
+            # La cella non va più colorata: gli stati che l'hanno colorata non esistono più.
+            # Le loro voci in frontiera vengono scartate all'estrazione
+            self._pending &= ~bit
+            cells = self._cells
+            self._closed = {key: entry for key, entry in self._closed.items() if not key // cells & bit}
+            self._reprioritize()
+        elif pending and not was_pending:
+            # La cella va colorata: gli stati chiusi sulla cella ottengono l'azione di pittura
+            self._pending |= bit
+            self._reprioritize()
+            cells, push, heuristic = self._cells, self._frontier.push, self._heuristic
+            for key, (moves, _, _) in self._closed.items():
+                if key % cells == index:
+                    child = key + bit * cells
+                    push((moves + heuristic(child // cells, index), moves, child, key, PAINT))
+        return True
+
+    def solve(self, budget=None, return_stats=False, track_memory=False):
+        """
+        Risolve la griglia corrente riprendendo la ricerca precedente. Dopo una correzione che
+        toglie una cella da colorare la soluzione è spesso già nell'insieme chiuso; dopo una che
+        ne aggiunge una, la ricerca riparte dagli stati chiusi sulla cella con l'azione di pittura.
+
+        :param budget: SearchBudget opzionale; se si esaurisce la ricerca si può riprendere con un'altra chiamata.
+        :param return_stats: Se True, restituisce anche le statistiche di questa chiamata.
+        :param track_memory: Se True, le statistiche includono il picco di memoria (tracemalloc, rallenta la ricerca).
+        :return: (percorso, costo, passaggi) come uniform_cost_search_optimized, None se non c'è soluzione,
+                 oppure BudgetExhausted.
+        """
+        stats = SearchStats("Incrementale", track_memory=track_memory).start()
+        self.reused_nodes = len(self._closed)
+        if budget is not None:
+            budget.start(self)
+        result = self._search(stats, budget)
+        self.expansions += stats.nodes_expanded
+        return finish_search(stats, result, return_stats)
+
+    @property
+    def initial(self):
+        # Per SearchBudget (stima della memoria per stato)
+        return (tuple(self._grid), self.start_position)
+
+    def _search(self, stats, budget):
+        cells, closed, moves_table = self._cells, self._closed, self._moves
+        pending, start, paint_cost = self._pending, self._start, self._paint_cost
+        goal = pending * cells + start
+        painted_cost = paint_cost * pending.bit_count()
+        frontier = self._frontier
+        push, pop, heuristic = frontier.push, frontier.pop, self._heuristic
+
+        while goal not in closed:
+            if not frontier:
+                return None
+            if len(frontier) > stats.peak_frontier:
+                stats.peak_frontier = len(frontier)
+            entry = pop()
+            _, moves, key, parent, code = entry
+            if key in closed:
+                stats.duplicate_pops += 1
+                continue
+            painted, position = divmod(key, cells)
+            if painted & ~pending or (parent is not None and parent not in closed):
+                continue  # stato di una griglia precedente alla correzione
+
+            if budget is not None:
+                reason = budget.exhausted(stats.nodes_expanded, len(frontier) + len(closed))
+                if reason is not None:
+                    push(entry)  # la ricerca riprende da qui alla prossima chiamata
+                    return BudgetExhausted(reason, entry[0] + painted_cost)
+
+            closed[key] = (moves, parent, code)
+            stats.nodes_expanded += 1
+            base = painted * cells
+            for move, neighbour in moves_table[position]:
+                child = base + neighbour
+                stats.nodes_generated += 1
+                if child not in closed:
+                    push((moves + 1 + heuristic(painted, neighbour), moves + 1, child, key, move))
+            bit = 1 << position
+            if pending & bit and not painted & bit:
+                stats.nodes_generated += 1
+                push((moves + heuristic(painted | bit, position), moves, key + bit * cells, key, PAINT))
+        stats.peak_closed = len(closed)
+        return self._solution(goal, painted_cost)
+
+    def _solution(self, goal, painted_cost):
+        closed = self._closed
+        moves = closed[goal][0]
+        codes = []
+        key = goal
+        while True:
+            _, parent, code = closed[key]
+            if parent is None:
+                break
+            codes.append(code)
+            key = parent
+        path = action_names(codes[::-1])
+        cost = moves + painted_cost
+        # Griglia finale: tutte le celle da colorare hanno il colore obiettivo
+        final = tuple("".join(self.goal_color if self._needs_paint(cell) else cell for cell in row) for row in self._grid)
+        return path, cost, [((final, self.start_position), cost, path)]
@@ -0,0 +1,98 @@
+import heapq
+
+from frontiera import make_tie_break
+from limiti import BudgetExhausted
+from ricercaapprossimata import tour_to_actions
+from statistiche import SearchStats, finish_search
+
+
+def _zero_heuristic(state, goal_color, color_costs):
+    return 0
+
+
+def macro_search(problem, heuristic=None, return_stats=False, budget=None, tie_break=None, track_memory=False):
+    """
+    A* sui successori a macro-azioni (UniformColoring.macro_successors): ogni passo raggiunge
+    una cella da colorare per un percorso minimo e la colora, l'ultimo torna alla posizione iniziale.
+    La profondità della ricerca è il numero di celle da colorare più uno invece del numero di mosse,
+    e la testina si trova solo sulle celle appena colorate. Il percorso restituito è espanso
+    nelle azioni primitive (Up, Down, Left, Right, Paint).
+
+    :param problem: Un'istanza del problema UniformColoring.
+    :param heuristic: Euristica ammissibile come per a_star_search_optimized (es. improved_heuristic);
+                      None = ricerca a costo uniforme.
+    :param return_stats: Se True, restituisce anche le statistiche.
+    :param budget: SearchBudget opzionale.
+    :param tie_break: Spareggio a parità di f (frontiera.TIE_BREAKS).
+    :param track_memory: Se True, le statistiche includono il picco di memoria (tracemalloc, rallenta la ricerca).
+    :return: (percorso, costo, passaggi) con un passaggio per macro-azione, None se non c'è soluzione,
+             oppure BudgetExhausted.
+    """
+    g_weight, h_weight, counter = make_tie_break(tie_break)
+    stats = SearchStats("A* a macro-azioni", track_memory=track_memory).start()
+    if budget is not None:
+        budget.start(problem)
+    result = _macro_search(problem, heuristic or _zero_heuristic, stats, budget, g_weight, h_weight, counter)
+    return finish_search(stats, result, return_stats)
+
+
+def _macro_search(problem, heuristic, stats, budget, g_weight, h_weight, counter):
+    goal_color, color_costs = problem.goal_color, problem.color_costs
+    h = heuristic(problem.initial, goal_color, color_costs)
+    # (f, spareggio, contatore, g, stato, destinazioni delle macro-azioni)
+    frontier = [(h, h_weight * h, counter(), 0, problem.initial, ())]
+    stats.nodes_generated += 1
+    explored = {}  # stato -> g con cui è stato espanso
+
+    while frontier:
+        if len(frontier) > stats.peak_frontier:
+            stats.peak_frontier = len(frontier)
+        entry = heapq.heappop(frontier)
+        f, _, _, g, state, targets = entry
+
+        if problem.goal_test(state):
+            return _solution(problem, targets, g)
+
+        best = explored.get(state)
+        if best is not None and best <= g:
+            if best == g:
+                stats.duplicate_pops += 1
+            else:
+                stats.stale_pops += 1
+            continue
+
+        if budget is not None:
+            reason = budget.exhausted(stats.nodes_expanded, len(frontier) + len(explored))
+            if reason is not None:
+                return BudgetExhausted(reason, f)
+
+        explored[state] = g
+        stats.nodes_expanded += 1
+        if len(explored) > stats.peak_closed:
+            stats.peak_closed = len(explored)
+
+        for target, child, step_cost in problem.macro_successors(state):
+            new_g = g + step_cost
+            stats.nodes_generated += 1
+            best = explored.get(child)
+            if best is None or best > new_g:
+                h = heuristic(child, goal_color, color_costs)
+                heapq.heappush(frontier, (new_g + h, g_weight * new_g + h_weight * h, counter(), new_g, child,
+                                          targets + (target,)))
+    return None
+
+
+def _solution(problem, targets, cost):
+    # Espande le macro-azioni in azioni primitive; un passaggio per ogni cella colorata e uno per il ritorno
+    start = problem.start_position
+    path = tour_to_actions(start, list(targets[:-1]), problem.distances if problem.blocked else None)
+
+    state, g, length = problem.initial, 0, 0
+    steps = []
+    for target in targets:
+        position = state[1]
+        _, state, step_cost = next(child for child in problem.macro_successors(state) if child[0] == target)
+        g += step_cost
+        length += problem.travel_distance(position, target) + (target != start)  # mosse più la pittura
+        steps.append((state, g, path[:length]))
+    return path, cost, steps or [(state, 0, [])]
@@ -0,0 +1,154 @@
+import math
+import time
+import tracemalloc
+
+from limiti import BudgetExhausted
+
+
+# Statistiche raccolte da un singolo algoritmo di ricerca
+class SearchStats:
+    def __init__(self, algorithm, track_memory=False):
+        """
+        :param algorithm: Nome dell'algoritmo (es. 'UCS', 'A*').
+        :param track_memory: Se True, misura il picco di memoria con tracemalloc (rallenta la ricerca).
+        """
+        self.algorithm = algorithm
+        self.track_memory = track_memory
+        self.nodes_generated = 0
+        self.nodes_expanded = 0
+        self.duplicate_pops = 0   # stato già espanso con lo stesso costo
+        self.stale_pops = 0       # stato già espanso con un costo migliore
+        self.peak_frontier = 0
+        self.peak_closed = 0
+        self.peak_memory = None   # byte, None se tracemalloc non è attivo
+        self.solution_depth = None
+        self.solution_cost = None
+        self.suboptimality_bound = None  # solo per le ricerche non ottime (es. anytime)
+        self.lower_bound = None          # limite inferiore noto sul costo ottimo
+        self.budget_exhausted = None     # motivo dell'interruzione, se un limite è stato raggiunto
+        self.bytes_written = None        # I/O su disco, solo per la ricerca in memoria esterna
+        self.bytes_read = None
+        self.pruned_children = None      # figli scartati dalla potatura sicura, solo se attiva
+        self.duration = 0.0       # secondi, misurati con un orologio monotono
+        self._started_tracing = False
+        self._start_time = None
+
+    def start(self):
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        self._start_time = time.perf_counter()
+        return self
+
+    def stop(self, path=None, cost=None):
+        self.duration = time.perf_counter() - self._start_time
+        if self.track_memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        if path is not None:
+            self.solution_depth = len(path)
+            self.solution_cost = cost
+        return self
+
+    @property
+    def effective_branching_factor(self):
+        """
+        Fattore di ramificazione effettivo b*: soluzione di N = b* + b*^2 + ... + b*^d,
+        con N nodi generati e d profondità della soluzione.
+        """
+        n, d = self.nodes_generated, self.solution_depth
+        if not d or n <= 0:
+            return None
+        if n <= d:
+            return 1.0
+
+        # log(b + ... + b^d) = log(b (b^d - 1) / (b - 1)), calcolato senza potenze per non uscire dal range dei float
+        def log_generated(b):
+            log_b = math.log(b)
+            return log_b + d * log_b + math.log1p(-math.exp(-d * log_b)) - math.log(b - 1)
+
+        log_n = math.log(n)
+        low, high = 1.0, float(n)
+        for _ in range(100):
+            mid = (low + high) / 2
+            if mid == low or log_generated(mid) < log_n:
+                low = mid
+            else:
+                high = mid
+        return (low + high) / 2
+
+    def as_dict(self):
+        return {
+            'algorithm': self.algorithm,
+            'nodes_generated': self.nodes_generated,
+            'nodes_expanded': self.nodes_expanded,
+            'duplicate_pops': self.duplicate_pops,
+            'stale_pops': self.stale_pops,
+            'peak_frontier': self.peak_frontier,
+            'peak_closed': self.peak_closed,
+            'peak_memory': self.peak_memory,
+            'solution_depth': self.solution_depth,
+            'solution_cost': self.solution_cost,
+            'suboptimality_bound': self.suboptimality_bound,
+            'lower_bound': self.lower_bound,
+            'budget_exhausted': self.budget_exhausted,
+            'bytes_written': self.bytes_written,
+            'bytes_read': self.bytes_read,
+            'pruned_children': self.pruned_children,
+            'effective_branching_factor': self.effective_branching_factor,
+            'duration': self.duration,
+        }
+
+    def summary(self):
+        ebf = self.effective_branching_factor
+        memory = f"{self.peak_memory / 1024:.1f} KiB" if self.peak_memory is not None else "n/d"
+        lines = [
+            f"Algoritmo: {self.algorithm}",
+            f"Nodi generati: {self.nodes_generated}",
+            f"Nodi espansi: {self.nodes_expanded}",
+            f"Estrazioni duplicate: {self.duplicate_pops}, obsolete: {self.stale_pops}",
+            f"Frontiera massima: {self.peak_frontier}, insieme chiuso massimo: {self.peak_closed}",
+            f"Picco di memoria: {memory}",
+            f"Fattore di ramificazione effettivo: {ebf:.3f}" if ebf is not None else "Fattore di ramificazione effettivo: n/d",
+            f"Tempo impiegato: {self.duration:.3f} secondi",
+        ]
+        if self.budget_exhausted is not None:
+            lines.append(f"Ricerca interrotta da un limite ({self.budget_exhausted}): risultato migliore trovato finora")
+        if self.pruned_children is not None:
+            lines.append(f"Figli potati: {self.pruned_children}")
+        if self.lower_bound is not None:
+            lines.append(f"Limite inferiore sul costo ottimo: {self.lower_bound}")
+        if self.suboptimality_bound is not None:
+            lines.append(f"Fattore di sub-ottimalità garantito: {self.suboptimality_bound:.3f}")
+        if self.bytes_written is not None:
+            lines.append(f"I/O su disco: {self.bytes_written / 1024:.1f} KiB scritti, {self.bytes_read / 1024:.1f} KiB letti")
+        return "\n".join(lines)
+
+
+def finish_search(stats, result, return_stats):
+    """
+    Chiude la misurazione e adatta il valore di ritorno di una ricerca.
+
+    :param stats: Le statistiche raccolte durante la ricerca.
+    :param result: Tupla (percorso, costo, passaggi), None se non c'è soluzione,
+                   oppure BudgetExhausted se la ricerca è stata interrotta da un limite.
+    :param return_stats: Se True, aggiunge le statistiche al risultato.
+    :return: Il risultato originale, oppure (percorso, costo, passaggi, statistiche).
+             Un BudgetExhausted viene restituito così com'è, con le statistiche parziali allegate.
+    """
+    if isinstance(result, BudgetExhausted):
+        stats.stop()
+        stats.budget_exhausted = result.reason
+        result.stats = stats
+        return result
+    path, cost = (result[0], result[1]) if result else (None, None)
+    stats.stop(path, cost)
+    if not return_stats:
+        return result
+    if result is None:
+        return None, None, [], stats
+    return (*result, stats)
@@ -0,0 +1,30 @@
+import math
+
+from statistiche import SearchStats
+
+
+def _stats(nodes_generated, solution_depth):
+    stats = SearchStats("UCS")
+    stats.nodes_generated = nodes_generated
+    stats.solution_depth = solution_depth
+    return stats
+
+
+def test_effective_branching_factor_exact_tree():
+    # 2 + 4 + 8 nodi generati a profondità 3: b* = 2
+    assert math.isclose(_stats(14, 3).effective_branching_factor, 2.0, rel_tol=1e-9)
+
+
+def test_effective_branching_factor_deep_solution_does_not_overflow():
+    stats = _stats(100000, 200)
+    ebf = stats.effective_branching_factor
+    assert 1.0 < ebf < 1.1
+    # La somma b* + ... + b*^d deve tornare al numero di nodi generati
+    assert math.isclose(sum(ebf ** i for i in range(1, 201)), 100000, rel_tol=1e-6)
+    assert stats.as_dict()['effective_branching_factor'] == ebf
+    assert "Fattore di ramificazione effettivo" in stats.summary()
+
+
+def test_effective_branching_factor_huge_inputs():
+    ebf = _stats(10 ** 12, 5000).effective_branching_factor
+    assert 1.0 < ebf < 1.01
@@ -0,0 +1,120 @@
+import json
+import random
+
+# Livelli degli eventi: vengono scritti solo quelli con livello >= del livello minimo del tracer
+LEVELS = {'debug': 10, 'info': 20, 'goal': 30}
+EVENT_LEVELS = {'push': 10, 'prune': 10, 'expand': 20, 'goal': 30}
+
+
+class SearchTracer:
+    def __init__(self, path, level='debug', sample_rate=1.0, buffer_size=4096, solution_only=False,
+                 neighbourhood=1, seed=0):
+        """
+        Traccia strutturata della ricerca: un evento JSON compatto per riga (JSONL), scritto a blocchi.
+
+        :param path: File di destinazione.
+        :param level: Livello minimo ('debug' = tutti gli eventi, 'info' = expand e goal, 'goal' = solo la soluzione).
+        :param sample_rate: Frazione di eventi da registrare (float), oppure dizionario evento -> frazione.
+                            Gli eventi 'goal' vengono sempre registrati.
+        :param buffer_size: Numero di eventi accumulati in memoria prima di scrivere su file.
+        :param solution_only: Se True, gli eventi vengono tenuti in memoria e alla fine si scrivono
+                              solo quelli sul percorso della soluzione e nel suo intorno.
+        :param neighbourhood: Ampiezza dell'intorno (in archi) attorno al percorso della soluzione.
+        :param seed: Seme per il campionamento.
+        """
+        self.path = path
+        self.min_level = LEVELS[level]
+        if isinstance(sample_rate, dict):
+            self.sample_rates = {event: sample_rate.get(event, 1.0) for event in EVENT_LEVELS}
+        else:
+            self.sample_rates = {event: sample_rate for event in EVENT_LEVELS}
+        self.sample_rates['goal'] = 1.0
+        self.buffer_size = buffer_size
+        self.solution_only = solution_only
+        self.neighbourhood = neighbourhood
+        self._random = random.Random(seed).random
+        self._buffer = []
+        self._pending = []  # eventi trattenuti in modalità solution_only
+        self._file = open(path, 'w')
+        self.events_written = 0
+
+    def enabled(self, event):
+        # Filtro economico da chiamare prima di costruire l'evento
+        if EVENT_LEVELS[event] < self.min_level:
+            return False
+        rate = self.sample_rates[event]
+        return rate >= 1.0 or self._random() < rate
+
+    def emit(self, event, state, key, parent=None, g=None, f=None, action=None):
+        """
+        Registra un evento.
+
+        :param event: 'expand', 'push', 'prune' o 'goal'.
+        :param state: Lo stato (griglia, posizione) a cui si riferisce l'evento.
+        :param key: Chiave di Zobrist dello stato, usata come identificativo del nodo: a differenza di hash(),
+                    che sulle stringhe cambia a ogni processo, è la stessa tra un'esecuzione e l'altra.
+        :param parent: Chiave di Zobrist dello stato padre (per 'push' e 'prune').
+        :param g: Costo del percorso.
+        :param f: Priorità f = g + h (solo A*).
+        :param action: Azione che ha generato lo stato.
+        """
+        grid, position = state
+        record = {'e': event, 's': key, 'p': list(position)}
+        if parent is not None:
+            record['q'] = parent
+        if g is not None:
+            record['g'] = g
+        if f is not None:
+            record['f'] = f
+        if action is not None:
+            record['a'] = action
+        if event in ('expand', 'goal'):
+            record['grid'] = "/".join(grid)
+
+        if self.solution_only and event != 'goal':
+            self._pending.append(record)
+            return
+        self._buffer.append(record)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def finish(self, solution_keys=()):
+        """
+        Chiude la traccia. In modalità solution_only scrive gli eventi relativi agli stati della soluzione
+        e a quelli raggiungibili da essi entro `neighbourhood` archi.
+
+        :param solution_keys: Chiavi di Zobrist degli stati lungo il percorso della soluzione (solution_keys).
+        """
+        if self.solution_only:
+            keep = set(solution_keys)
+            for _ in range(self.neighbourhood):
+                keep |= {record['s'] for record in self._pending if record.get('q') in keep}
+            self._buffer[:0] = [record for record in self._pending if record['s'] in keep]
+            self._pending = []
+        self.flush()
+        self._file.close()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("".join(json.dumps(record, separators=(',', ':')) + "\n" for record in self._buffer))
+            self.events_written += len(self._buffer)
+            self._buffer = []
+
+
+def solution_states(problem, path):
+    # Ricostruisce gli stati attraversati da un percorso di azioni
+    state = problem.initial
+    states = [state]
+    for action in path:
+        state = problem.result(state, action)
+        states.append(state)
+    return states
+
+
+def solution_keys(problem, path):
+    # Chiavi di Zobrist degli stati attraversati da un percorso, come negli eventi della traccia
+    return [problem.zobrist_key(state) for state in solution_states(problem, path)]
+
+
+# File usato dalla modalità debug delle ricerche quando non viene passato un tracer
+DEBUG_TRACE_PATH = 'traccia_ricerca.jsonl'
@@ -0,0 +1,550 @@
+import random
+
+from azioni import ACTION_CODES, ACTION_NAMES, BLOCKED, OFFSETS, PAINT, action_names, blocked_cells, move_table
+from frontiera import make_frontier, make_tie_break
+from limiti import BudgetExhausted
+from statistiche import SearchStats, finish_search
+from tracciamento import DEBUG_TRACE_PATH, SearchTracer, solution_keys
+
+# Modello del problema e motori di ricerca, importabili senza OpenCV, Tesseract, Tkinter, PIL o aima3
+# (es. per processi che risolvono solo griglie già acquisite).
+
+# Classe del problema di Uniform Coloring
+# Stessa interfaccia di aima3.search.Problem (initial, actions, result, goal_test, path_cost),
+# ma senza dipendere da aima3: il modulo del solutore non importa librerie pesanti
+class UniformColoring:
+    def __init__(self, initial, goal_color, start_position, color_costs):
+        grid, position = initial
+        self.initial = (tuple(grid), tuple(position))
+        self.goal = None
+        self.goal_color = goal_color
+        self.start_position = tuple(start_position)
+        self.color_costs = color_costs
+        self.rows, self.cols = len(grid), len(grid[0])
+        # Le celle bloccate ('X') non si attraversano e non si colorano
+        self.blocked = blocked_cells(grid)
+        self._moves = move_table(self.rows, self.cols, self.blocked)
+        self._paint_cost = color_costs[goal_color]
+        self._paintable = sum(len(row) - row.count('T') - row.count(BLOCKED) for row in grid)
+        self._distances = None
+        self._pruned_moves = None
+        self._init_zobrist(grid)
+
+    def _init_zobrist(self, grid):
+        # Chiavi di Zobrist a 64 bit: un valore casuale per ogni posizione della testina
+        # e per ogni coppia (cella, lettera). Il generatore ha un seme fisso: le chiavi sono riproducibili
+        rng = random.Random(0)
+        cells = self.rows * self.cols
+        self._position_keys = [rng.getrandbits(64) for _ in range(cells)]
+        letters = sorted(set(self.color_costs) | set("".join(grid)) | {'T', BLOCKED})
+        self._cell_keys = [{letter: rng.getrandbits(64) for letter in letters} for _ in range(cells)]
+        # Movimenti con la differenza (XOR) tra la chiave della posizione di partenza e di arrivo
+        cols, position_keys = self.cols, self._position_keys
+        self._keyed_moves = [tuple((code, (nx, ny), position_keys[index] ^ position_keys[nx * cols + ny])
+                                   for code, (nx, ny) in moves)
+                             for index, moves in enumerate(self._moves)]
+
+    def zobrist_key(self, state):
+        """
+        Chiave di Zobrist di uno stato calcolata da zero (O(celle)): serve solo per lo stato iniziale,
+        quella dei figli si aggiorna con keyed_successors.
+        """
+        grid, (x, y) = state
+        key = self._position_keys[x * self.cols + y]
+        cell_keys = self._cell_keys
+        for index, letter in enumerate("".join(grid)):
+            letter_keys = cell_keys[index]
+            if letter not in letter_keys:
+                letter_keys[letter] = random.Random(f"{index}:{letter}").getrandbits(64)
+            key ^= letter_keys[letter]
+        return key
+
+    @property
+    def distances(self):
+        """
+        Tabella delle distanze minime tra tutte le coppie di celle (distanze.DistanceTable),
+        calcolata alla prima richiesta: NumPy viene importato solo se serve.
+        """
+        if self._distances is None:
+            from distanze import distance_table
+            self._distances = distance_table(self.rows, self.cols, self.blocked)
+        return self._distances
+
+    def successors(self, state):
+        """
+        Figli di uno stato per i motori di ricerca, senza confronti tra stringhe.
+
+        :return: Lista di (codice azione, stato figlio, costo del passo).
+        """
+        grid, position = state
+        x, y = position
+        # I movimenti non cambiano la griglia: il figlio condivide la stessa tupla di righe
+        children = [(code, (grid, new_position), 1) for code, new_position in self._moves[x * self.cols + y]]
+
+        # Azione di colorazione solo se la cella non è colorata e non è la posizione iniziale
+        # (la 'T' non viene quindi mai sovrascritta)
+        if grid[x][y] != self.goal_color and position != self.start_position:
+            row = grid[x]
+            new_grid = grid[:x] + (row[:y] + self.goal_color + row[y + 1:],) + grid[x + 1:]
+            children.append((PAINT, (new_grid, position), self._paint_cost))
+        return children
+
+    def keyed_successors(self, state, key):
+        """
+        Come successors, ma con la chiave di Zobrist del figlio aggiornata in O(1) con uno XOR:
+        un movimento cambia solo la chiave della posizione, la pittura quella di una cella.
+
+        :param key: Chiave di Zobrist di `state`.
+        :return: Lista di (codice azione, stato figlio, costo del passo, chiave del figlio).
+        """
+        grid, position = state
+        x, y = position
+        index = x * self.cols + y
+        children = [(code, (grid, new_position), 1, key ^ delta) for code, new_position, delta in self._keyed_moves[index]]
+
+        row = grid[x]
+        cell = row[y]
+        if cell != self.goal_color and position != self.start_position:
+            new_grid = grid[:x] + (row[:y] + self.goal_color + row[y + 1:],) + grid[x + 1:]
+            letter_keys = self._cell_keys[index]
+            children.append((PAINT, (new_grid, position), self._paint_cost,
+                             key ^ letter_keys[cell] ^ letter_keys[self.goal_color]))
+        return children
+
+    def _init_pruning(self):
+        # Movimenti ammessi per ogni posizione e ultima azione (codice di movimento, oppure PAINT
+        # per lo stato iniziale e dopo una pittura), come (codice, posizione, delta della chiave, angolo).
+        # L'inversione dell'ultimo movimento è esclusa qui; un movimento verticale dopo uno orizzontale
+        # conserva la cella d'angolo da controllare durante la ricerca (None = sempre ammesso)
+        cols = self.cols
+        table = []
+        for index, moves in enumerate(self._keyed_moves):
+            y = index % cols
+            by_last = []
+            for last in range(PAINT + 1):
+                allowed = []
+                for code, new_position, delta in moves:
+                    corner = None
+                    if last != PAINT:
+                        if code == last ^ 1:
+                            continue  # inversione: riporta allo stato del nonno
+                        if OFFSETS[code][0] and OFFSETS[last][1]:
+                            # Da (x, y - dy) l'ordine canonico passa per l'angolo (x + dx, y - dy)
+                            corner = (new_position[0], y - OFFSETS[last][1])
+                            if not 0 <= corner[1] < cols or corner in self.blocked:
+                                corner = None
+                    allowed.append((code, new_position, delta, corner))
+                by_last.append(tuple(allowed))
+            table.append(tuple(by_last))
+        self._pruned_moves = table
+
+    def pruned_successors(self, state, key, last):
+        """
+        Come keyed_successors, ma senza i figli che regole di potatura sicure dimostrano inutili
+        (il costo ottimo non cambia):
+        - pittura forzata: su una cella da colorare l'unico figlio è la pittura. Il suo costo
+          va pagato comunque e i movimenti non dipendono dai colori, quindi anticiparla non allunga
+          nessun piano;
+        - nessuna inversione: il movimento opposto all'ultimo (senza pittura in mezzo) riporta
+          allo stato del nonno, già espanso con costo minore;
+        - ordine canonico: un movimento orizzontale e uno verticale commutano se la cella d'angolo
+          è libera e non va colorata; si tiene solo l'ordine "prima verticale, poi orizzontale".
+          L'ordine alternativo arriva allo stesso figlio con lo stesso costo e il suo secondo passo
+          (orizzontale) può essere scartato solo come inversione, cioè verso uno stato già espanso.
+
+        :param key: Chiave di Zobrist di `state`.
+        :param last: Codice dell'ultima azione del percorso (None per lo stato iniziale).
+        :return: (figli come keyed_successors, numero di figli scartati).
+        """
+        grid, position = state
+        x, y = position
+        index = x * self.cols + y
+        row = grid[x]
+        cell = row[y]
+        goal_color = self.goal_color
+        if cell != goal_color and position != self.start_position:
+            new_grid = grid[:x] + (row[:y] + goal_color + row[y + 1:],) + grid[x + 1:]
+            letter_keys = self._cell_keys[index]
+            return ([(PAINT, (new_grid, position), self._paint_cost, key ^ letter_keys[cell] ^ letter_keys[goal_color])],
+                    len(self._moves[index]))
+
+        if self._pruned_moves is None:
+            self._init_pruning()
+        start = self.start_position
+        children = []
+        for code, new_position, delta, corner in self._pruned_moves[index][PAINT if last is None else last]:
+            if corner is not None and (grid[corner[0]][corner[1]] == goal_color or corner == start):
+                continue  # lo stesso figlio si raggiunge nell'ordine canonico
+            children.append((code, (grid, new_position), 1, key ^ delta))
+        return children, len(self._moves[index]) - len(children)
+
+    def travel_distance(self, a, b):
+        # Mosse di un percorso minimo tra due celle, None se `b` è irraggiungibile a causa delle celle bloccate
+        if not self.blocked:
+            return abs(a[0] - b[0]) + abs(a[1] - b[1])
+        table = self.distances
+        distance = table.distance(a, b)
+        return None if distance == table.unreachable else distance
+
+    def macro_successors(self, state):
+        """
+        Successori a macro-azioni: per ogni cella ancora da colorare, "vai per un percorso minimo alla cella
+        e colorala"; quando non resta nulla da colorare, "torna alla posizione iniziale".
+        Le mosse attraversano anche celle non colorate: colorarle subito non è mai obbligatorio,
+        quindi ogni soluzione ottima è una sequenza di queste macro-azioni.
+
+        :return: Lista di (cella di destinazione, stato figlio, costo esatto della macro-azione).
+        """
+        grid, position = state
+        goal_color, paint_cost = self.goal_color, self._paint_cost
+        children = []
+        pending = False
+        for x, row in enumerate(grid):
+            for y, cell in enumerate(row):
+                if cell == goal_color or cell == 'T' or cell == BLOCKED:
+                    continue
+                pending = True
+                moves = self.travel_distance(position, (x, y))
+                if moves is not None:
+                    new_grid = grid[:x] + (row[:y] + goal_color + row[y + 1:],) + grid[x + 1:]
+                    children.append(((x, y), (new_grid, (x, y)), moves + paint_cost))
+        if not pending and position != self.start_position:
+            children.append((self.start_position, (grid, self.start_position),
+                             self.travel_distance(position, self.start_position)))
+        return children
+
+    def actions(self, state):
+        grid, (x, y) = state
+        actions = [ACTION_NAMES[code] for code, _ in self._moves[x * self.cols + y]]
+        if grid[x][y] != self.goal_color and (x, y) != self.start_position:
+            actions.append('Paint')
+        return actions
+
+    def result(self, state, action):
+        grid, (x, y) = state
+        code = ACTION_CODES[action]
+        if code == PAINT:
+            if (x, y) == self.start_position:
+                return state  # la 'T' resta nella posizione iniziale
+            row = grid[x]
+            return (grid[:x] + (row[:y] + self.goal_color + row[y + 1:],) + grid[x + 1:], (x, y))
+        dx, dy = OFFSETS[code]
+        return (grid, (x + dx, y + dy))
+
+    def goal_test(self, state):
+        grid, position = state
+        # Verifica che la testina sia nella posizione iniziale e che tutte le celle colorabili abbiano
+        # il colore obiettivo (conteggio con str.count, senza cicli Python sulle celle)
+        return position == self.start_position and sum(row.count(self.goal_color) for row in grid) == self._paintable
+
+    def path_cost(self, c, state1, action, state2):
+        # Ogni movimento costa 1, la pittura il costo del colore obiettivo
+        code = ACTION_CODES.get(action)
+        if code is None:
+            return c
+        return c + (self._paint_cost if code == PAINT else 1)
+
+# Funzioni ausiliarie per UCS/A*
+def find_starting_position(grid):
+    positions = [(x, y) for x, row in enumerate(grid) for y, cell in enumerate(row) if cell == 'T']
+    
+    if len(positions) == 0:
+        raise ValueError("Errore: 'T' non trovato nella griglia.")
+    elif len(positions) > 1:
+        raise ValueError("Errore: Più di una testina ('T') trovata nella griglia.")
+    
+    return positions[0]
+
+def print_grid(grid):
+    for row in grid:
+        print(" ".join(row))
+    print()
+
+def calculate_total_cost(grid, color, start_position, color_costs):
+    # Costo di pittura delle celle raggiungibili dalla testina che non hanno il colore scelto,
+    # calcolato con le maschere vettoriali di griglia.Grid (NumPy viene importato solo qui)
+    from griglia import as_grid
+    grid = as_grid(grid)
+    reachable = None
+    if grid.blocked:
+        from distanze import distance_table
+        table = distance_table(*grid.shape, grid.blocked)
+        reachable = (table.from_cell(start_position) != table.unreachable).reshape(grid.shape)
+    return grid.paint_cost(color, color_costs, reachable)
+
+def find_optimal_goal_color(grid, start_position, color_costs):
+    colors = color_costs.keys()
+    costs = {color: calculate_total_cost(grid, color, start_position, color_costs) for color in colors}
+    optimal_color = min(costs, key=costs.get)
+    print(f"Costi per ogni colore: {costs}")
+    print(f"Colore obiettivo ottimale: {optimal_color}")
+    return optimal_color
+
+# Funzione UCS ottimizzata con gestione migliorata della frontiera
+# frontier: 'heap' (heapq) oppure 'bucket' (coda di Dial, sfrutta i costi interi delle azioni)
+# heatmap: mappacalore.ExpansionHeatmap opzionale, aggiornata a ogni espansione
+# tie_break: spareggio a parità di costo (frontiera.TIE_BREAKS, None = predefinito della frontiera)
+# prune: se True, i figli vengono generati con UniformColoring.pruned_successors (costo ottimo invariato)
+# track_memory: se True, le statistiche includono il picco di memoria (tracemalloc, rallenta la ricerca)
+def uniform_cost_search_optimized(problem, debug=False, return_stats=False, tracer=None, budget=None, frontier='heap',
+                                  heatmap=None, tie_break=None, prune=False, track_memory=False):
+    tie = make_tie_break(tie_break, frontier)  # valida la politica prima di iniziare
+    # In modalità debug la ricerca viene tracciata su file (JSONL) invece di stampare ogni figlio
+    if debug and tracer is None:
+        tracer = SearchTracer(DEBUG_TRACE_PATH)
+    stats = SearchStats("UCS", track_memory=track_memory).start()
+    if prune:
+        stats.pruned_children = 0
+    if budget is not None:
+        budget.start(problem)
+    result = _uniform_cost_search(problem, tracer, stats, budget, make_frontier(frontier), heatmap, tie, prune)
+    output = finish_search(stats, result, return_stats)
+    if tracer is not None:
+        tracer.finish(solution_keys(problem, result[0]) if result else ())
+    return output
+
+def _uniform_cost_search(problem, tracer, stats, budget, frontier, heatmap, tie, prune):
+    # Coda prioritaria (heap o bucket) che tiene traccia degli stati
+    push, pop = frontier.push, frontier.pop
+    # In UCS h = 0 e a parità di costo anche g è uguale: decide solo il verso del contatore (FIFO o LIFO)
+    _, _, counter = tie
+    # Aggiungiamo lo stato iniziale nella frontiera con un costo pari a 0
+    # (costo, contatore, stato, percorso delle azioni, chiave): il contatore evita i confronti tra stati
+    push((0, counter(), problem.initial, [], problem.zobrist_key(problem.initial)))
+    stats.nodes_generated += 1
+    
+    # Stati esplorati indicizzati dalla chiave di Zobrist (un intero: nessun rehash delle righe):
+    # chiave -> (stato, costo minimo con cui è stato esplorato). Lo stato memorizzato permette
+    # di verificare le collisioni; gli stati in collisione finiscono in `collisions`, indicizzati dallo stato
+    explored = {}
+    collisions = {}
+    
+    while frontier:
+        if len(frontier) > stats.peak_frontier:
+            stats.peak_frontier = len(frontier)
+        cost, _, state, path, key = pop()  # Estrarre lo stato con il costo più basso
+        
+        # Early goal detection: se abbiamo raggiunto lo stato obiettivo, terminiamo
+        if problem.goal_test(state):
+            if tracer is not None:
+                tracer.emit('goal', state, key, g=cost)
+            path = action_names(path)
+            return path, cost, [(state, cost, path)]
+        
+        seen = explored.get(key)
+        if seen is not None:
+            seen_state, seen_cost = seen
+            if seen_state != state:
+                seen_cost = collisions.get(state)
+            if seen_cost is not None:
+                if seen_cost == cost:
+                    stats.duplicate_pops += 1
+                else:
+                    stats.stale_pops += 1
+                continue
+        
+        # Limiti di risorse e annullamento: il nodo estratto fornisce un limite inferiore sull'ottimo
+        if budget is not None:
+            reason = budget.exhausted(stats.nodes_expanded, len(frontier) + len(explored))
+            if reason is not None:
+                return BudgetExhausted(reason, cost)
+
+        # Memorizziamo il miglior costo esplorato per lo stato
+        if seen is None:
+            explored[key] = (state, cost)
+        else:
+            collisions[state] = cost
+        stats.nodes_expanded += 1
+        if len(explored) > stats.peak_closed:
+            stats.peak_closed = len(explored)
+        if heatmap is not None:
+            heatmap.record(state)
+        if tracer is not None and tracer.enabled('expand'):
+            tracer.emit('expand', state, key, g=cost)
+        
+        # I percorsi interni sono liste di codici interi, convertiti in nomi solo nel risultato
+        if prune:
+            children, pruned = problem.pruned_successors(state, key, path[-1] if path else None)
+            stats.pruned_children += pruned
+        else:
+            children = problem.keyed_successors(state, key)
+        for code, child, step_cost, child_key in children:
+            new_cost = cost + step_cost
+            stats.nodes_generated += 1
+
+            # Early goal detection: controllo immediato se il figlio è la soluzione
+            if problem.goal_test(child):
+                if tracer is not None:
+                    tracer.emit('goal', child, child_key, key, g=new_cost, action=ACTION_NAMES[code])
+                new_path = action_names(path + [code])
+                return new_path, new_cost, [(child, new_cost, new_path)]
+
+            # Ottimizzazione: esploriamo solo nuovi stati o stati con costi migliori
+            # (in caso di collisione il figlio viene inserito e verificato all'estrazione)
+            seen = explored.get(child_key)
+            if seen is None or seen[1] > new_cost or seen[0] != child:
+                push((new_cost, counter(), child, path + [code], child_key))
+                if tracer is not None and tracer.enabled('push'):
+                    tracer.emit('push', child, child_key, key, g=new_cost, action=ACTION_NAMES[code])
+            elif tracer is not None and tracer.enabled('prune'):
+                tracer.emit('prune', child, child_key, key, g=new_cost, action=ACTION_NAMES[code])
+
+    return None
+
+# Funzione A* ottimizzata con gestione migliorata della frontiera
+# frontier: 'heap' (heapq) oppure 'bucket' (coda di Dial, richiede un'euristica a valori interi)
+# heatmap: mappacalore.ExpansionHeatmap opzionale, aggiornata a ogni espansione
+# tie_break: spareggio a parità di f (frontiera.TIE_BREAKS, None = predefinito della frontiera)
+# prune: se True, i figli vengono generati con UniformColoring.pruned_successors (costo ottimo invariato)
+# track_memory: se True, le statistiche includono il picco di memoria (tracemalloc, rallenta la ricerca)
+def a_star_search_optimized(problem, heuristic, debug=False, return_stats=False, tracer=None, budget=None, frontier='heap',
+                            heatmap=None, tie_break=None, prune=False, track_memory=False):
+    tie = make_tie_break(tie_break, frontier)  # valida la politica prima di iniziare
+    # In modalità debug la ricerca viene tracciata su file (JSONL) invece di stampare ogni figlio
+    if debug and tracer is None:
+        tracer = SearchTracer(DEBUG_TRACE_PATH)
+    stats = SearchStats("A*", track_memory=track_memory).start()
+    if prune:
+        stats.pruned_children = 0
+    if budget is not None:
+        budget.start(problem)
+    result = _a_star_search(problem, heuristic, tracer, stats, budget, make_frontier(frontier), heatmap, tie, prune)
+    output = finish_search(stats, result, return_stats)
+    if tracer is not None:
+        tracer.finish(solution_keys(problem, result[0]) if result else ())
+    return output
+
+def _a_star_search(problem, heuristic, tracer, stats, budget, frontier, heatmap, tie, prune):
+    push, pop = frontier.push, frontier.pop
+    g_weight, h_weight, counter = tie
+    initial_key = problem.zobrist_key(problem.initial)
+    h = heuristic(problem.initial, problem.goal_color, problem.color_costs)
+    # (f(n), spareggio, contatore, g(n), stato, percorso delle azioni, chiave): il contatore evita i confronti tra stati
+    push((h, h_weight * h, counter(), 0, problem.initial, [], initial_key))
+    stats.nodes_generated += 1
+    
+    # Miglior g per stato, indicizzato dalla chiave di Zobrist: chiave -> (stato, g).
+    # Gli stati in collisione con uno già memorizzato finiscono in `collisions`, indicizzati dallo stato
+    explored = {}
+    collisions = {}
+    
+    while frontier:
+        if len(frontier) > stats.peak_frontier:
+            stats.peak_frontier = len(frontier)
+        f, _, _, g, state, path, key = pop()
+        
+        if problem.goal_test(state):
+            if tracer is not None:
+                tracer.emit('goal', state, key, g=g, f=f)
+            path = action_names(path)
+            return path, g, [(state, g, path)]
+        
+        seen = explored.get(key)
+        collision = False
+        best = None
+        if seen is not None:
+            if seen[0] == state:
+                best = seen[1]
+            else:
+                collision = True
+                best = collisions.get(state)
+        if best is not None and best <= g:
+            if best == g:
+                stats.duplicate_pops += 1
+            else:
+                stats.stale_pops += 1
+            continue
+        
+        # Limiti di risorse e annullamento: il nodo estratto fornisce un limite inferiore sull'ottimo
+        if budget is not None:
+            reason = budget.exhausted(stats.nodes_expanded, len(frontier) + len(explored))
+            if reason is not None:
+                return BudgetExhausted(reason, f)
+
+        if collision:
+            collisions[state] = g
+        else:
+            explored[key] = (state, g)
+        stats.nodes_expanded += 1
+        if len(explored) > stats.peak_closed:
+            stats.peak_closed = len(explored)
+        if heatmap is not None:
+            heatmap.record(state)
+        if tracer is not None and tracer.enabled('expand'):
+            tracer.emit('expand', state, key, g=g, f=f)
+        
+        if prune:
+            children, pruned = problem.pruned_successors(state, key, path[-1] if path else None)
+            stats.pruned_children += pruned
+        else:
+            children = problem.keyed_successors(state, key)
+        for code, child, step_cost, child_key in children:
+            new_g = g + step_cost
+            stats.nodes_generated += 1
+            
+            seen = explored.get(child_key)
+            if seen is None or seen[1] > new_g or seen[0] != child:
+                h = heuristic(child, problem.goal_color, problem.color_costs)
+                new_f = new_g + h
+                push((new_f, g_weight * new_g + h_weight * h, counter(), new_g, child, path + [code], child_key))
+                if tracer is not None and tracer.enabled('push'):
+                    tracer.emit('push', child, child_key, key, g=new_g, f=new_f, action=ACTION_NAMES[code])
+            elif tracer is not None and tracer.enabled('prune'):
+                tracer.emit('prune', child, child_key, key, g=new_g, action=ACTION_NAMES[code])
+
+    return None
+
+def print_optimal_solution_steps(optimal_solution_steps):
+    for i, (state, cost, path) in enumerate(optimal_solution_steps):
+        grid, _ = state
+        print(f"Passaggio {i + 1}, Costo: {cost}, Azioni: {' -> '.join(path)}")
+        print_grid(grid)
+
+# Oltre questo numero di celle le euristiche usano le operazioni vettoriali di griglia.py
+VECTOR_THRESHOLD = 64
+
+# Euristica migliorata per A* che considera i costi di pittura e la distanza massima
+# (la 'T' non va colorata: contarla renderebbe l'euristica non ammissibile)
+def improved_heuristic(state, goal_color, color_costs):
+    grid, (tx, ty) = state
+    # Sulle griglie grandi conviene la versione vettoriale (NumPy viene importato solo qui)
+    if len(grid) * len(grid[0]) > VECTOR_THRESHOLD:
+        from griglia import improved_heuristic_vector
+        return improved_heuristic_vector(state, goal_color, color_costs)
+
+    total_paint_cost = 0
+    max_distance = 0
+    
+    for x, row in enumerate(grid):
+        for y, cell in enumerate(row):
+            if cell != goal_color and cell != 'T' and cell != BLOCKED:
+                # Aggiungi il costo di pittura per ogni cella che non è colorata correttamente
+                total_paint_cost += color_costs[goal_color]
+                
+                # Calcola la distanza di Manhattan dalla testina alla cella corrente
+                distance = abs(tx - x) + abs(ty - y)
+                
+                # Tieni traccia della distanza massima per considerare la cella più lontana
+                if distance > max_distance:
+                    max_distance = distance
+
+    # L'euristica è la somma del costo di pittura più la distanza massima per raggiungere la cella più lontana
+    return total_paint_cost + max_distance
+
+
+# Somma delle distanze di Manhattan dalla testina alle celle non ancora colorate
+def heuristic_manhattan_distance(state, goal_color, color_costs):
+    grid, (tx, ty) = state
+    total_distance = 0
+    for x, row in enumerate(grid):
+        for y, cell in enumerate(row):
+            if cell != goal_color and cell != BLOCKED:
+                total_distance += abs(tx - x) + abs(ty - y)
+    return total_distance
+
+
+# Ricerche anytime, approssimata, gerarchica e a macro-azioni, esposte anche da questo modulo
+from ricercaanytime import anytime_a_star_search  # noqa: E402
+from ricercaapprossimata import approximate_tour_search  # noqa: E402
+from ricercagerarchica import hierarchical_search  # noqa: E402
+from ricercamacro import macro_search  # noqa: E402